@@ -9,15 +9,21 @@ Plugin is devoted for working with svg files. Splitting, Slicing into icons, mer
 
 
 - METHODS
+Every method runs in background thread, so blender stays responsive. Methods started while one is running wait in
+queue. Panel shows progress of running method and Cancel button, which stops it and drops queued ones. Cancelled
+method leaves only finished output files.
 
 SVG input split - splitting svg file into pieces not exceeding selected size.
 Input - file or directory to apply to all files.
 Output - directory or leave empty. In case of leaving empty directory will be taken from input file.
 Max Size - size for output files
+Workers - threads splitting files of input directory, 0 for all cores.
+Passthrough - copy source bytes instead of writing every element again, comments are kept.
 
 SVG output merge - merge files into one. Output file will be named MERGE.SVG
 Input - directory whence to take files
 Output - directory or leave empty. In case of leaving empty output directory will be equal input.
+Merge Repeated Definitions - keep one copy of identical definitions of all parts.
 
 SVG parse images
 Scan file for external links and write down result about their availability. Result will be put down as blender text "svg parse images".
@@ -36,13 +42,57 @@ SVG icon slicer - slice svg into files of given block size and moving into cente
 New file names is taken from link of image object on right to the icon block
 Input - file to slice
 Output - directory or leave empty. In case of leaving empty files will be written in new directory named "input file + out"
+
+- COMMAND LINE
+Engine doesn't need blender, bpy is imported only by register(). Every method can be run with explicit arguments:
+python -m 1D_SVG_Tools split input [-o output] [--size 2] [--workers 1] [--pool process|thread] [--passthrough]
+python -m 1D_SVG_Tools merge directory [-o output] [--dedupe]
+python -m 1D_SVG_Tools parse-images input [--crop-abs]
+python -m 1D_SVG_Tools copy-images input [-o output] [--crop-abs] [--workers 1] [--checksum]
+python -m 1D_SVG_Tools extract-images input [-o output] [--images directory]
+python -m 1D_SVG_Tools inline-images input [-o output]
+python -m 1D_SVG_Tools slice input [-o output] [--transformed] [--workers 1] [--pool thread|process]
+    [--region 0,0,3,3] [--straddle anchor|center|drop] [--force] [--prune] [--rcc] [--rcc-level -1]
+    [--variants variants.json]
+--region slices only cells from first column, row to last column, row. --straddle selects cell of shape crossing
+cell border: cell of its first point, cell of box center or none.
+Slicer keeps "input file.manifest.json" with icon hashes in output directory and writes only added and changed
+icons. --force rewrites all of them, --prune deletes icons removed from sheet.
+--rcc writes binary qt resource of theme next to qrc without rcc tool, --rcc-level is zlib level (0 - raw data).
+--variants json {"dark": {"colors": {"#1a1a1a": "#eeeeee"}, "size": 32}} writes theme "input file_dark" into
+output/dark from the same parse, colors are replaced in fill, stroke, stop-color and style of whole icon,
+size sets width and height keeping viewBox and icon size of index.theme.
+base theme is written into output as well, variant with empty name "" changes it.
+--parser expat|lxml|html before method name selects StructureBuilder backend, fastest available by default.
+--mmap before method name feeds parser from memory map instead of read calls.
+--profile file.json before method name writes wall and cpu time of its phases and counters into json and prints them,
+--trace-memory adds peak of python memory by tracemalloc. blender writes the same report into "svg profile" text.
+--cache directory before method name keeps parsed trees and image links there, unchanged file (path, size, mtime,
+--cache-verify adds content hash) isn't parsed again. blender keeps them in memory for session, limited by cache size.
 """
 
 
 
 import os
+import io
+import itertools
+import sys
+import threading
+import time
+import tracemalloc
+import traceback
+import mmap
+import codecs
+import argparse
+import binascii
+import concurrent.futures
 import collections
-import string
+import hashlib
+import json
+import marshal
+import shutil
+import struct
+import zlib
 import _markupbase
 from html import unescape
 import re
@@ -50,9 +100,17 @@ import warnings
 from html.parser import interesting_normal, incomplete, entityref, charref, starttagopen, piclose, commentclose, \
     tagfind_tolerant, attrfind_tolerant, locatestarttagend_tolerant, endendtag, endtagfind
 from xml.sax.saxutils import escape
-import copy
-import xml
-import bpy
+import xml.parsers.expat
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 bl_info = {
@@ -75,10 +133,10 @@ Inherits=FreeCAD-default
 Directories=scalable
 
 [scalable]
-Size=64
+Size=%i
 Type=Scalable
 MinSize=1
-MaxSize=256
+MaxSize=%i
 """
 
 
@@ -94,39 +152,434 @@ file_name_qrc_suffix = """    </qresource>
 """
 
 
+class JobCancelled(Exception):
+    """raised by Job.progress in thread of cancelled job"""
+
+
+class Job(object):
+    """function running on its own thread. engine reports progress of the job of current thread at places where
+    output is consistent, Job.progress does nothing outside of job and raises JobCancelled once job is cancelled.
+    result, error text or cancelled are set when thread ends, finish(job) is left to the thread polling queue.
+    profile is entered around function, jobs of one queue don't overlap, so they don't mix their profiles"""
+
+    local = threading.local()
+
+    def __init__(self, name, function, args=(), kwargs=None, finish=None, profile=None):
+        self.name = name
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.finish = finish
+        self.profile = profile  # Profile entered while function runs
+        self.stage = ""
+        self.done = 0
+        self.total = 0
+        self.size = False   # done and total are bytes
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name=self.name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        Job.local.job = self
+        try:
+            if self.profile is not None:
+                with self.profile:
+                    self.result = self.function(*self.args, **self.kwargs)
+            else:
+                self.result = self.function(*self.args, **self.kwargs)
+        except JobCancelled:
+            self.cancelled = True
+        except Exception:
+            self.error = traceback.format_exc()
+        finally:
+            Job.local.job = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def finished(self):
+        return self.thread is not None and not self.thread.is_alive()
+
+    def text(self):
+        if not self.total:
+            return "%s: %s" % (self.name, self.stage or "waiting")
+        if self.size:
+            return "%s: %s %.1f/%.1f MB" % (self.name, self.stage, self.done / 2 ** 20, self.total / 2 ** 20)
+        return "%s: %s %i/%i" % (self.name, self.stage, self.done, self.total)
+
+    @classmethod
+    def progress(cls, stage, done, total, size=False):
+        job = getattr(cls.local, "job", None)
+        if job is None:
+            return
+        job.stage, job.done, job.total, job.size = stage, done, total, size
+        if job.cancel_event.is_set():
+            raise JobCancelled()
+
+    @classmethod
+    def cancel_futures(cls, futures):
+        """wait for futures already running, cancel the rest"""
+        for future in futures:
+            future.cancel()
+        concurrent.futures.wait(futures)
+
+
+class JobQueue(object):
+    """jobs run one after another in order of submit"""
+
+    def __init__(self):
+        self.jobs = collections.deque()
+        self.current = None
+
+    def submit(self, job):
+        self.jobs.append(job)
+
+    def poll(self):
+        """start next job when current one has finished. returns finished job or None"""
+        finished = None
+        if self.current is not None and self.current.finished:
+            finished = self.current
+            self.current = None
+        if self.current is None and self.jobs:
+            self.current = self.jobs.popleft()
+            self.current.start()
+        return finished
+
+    def cancel(self):
+        """drop queued jobs, current one stops at next progress report"""
+        self.jobs.clear()
+        if self.current is not None:
+            self.current.cancel()
+
+    @property
+    def busy(self):
+        return self.current is not None or bool(self.jobs)
+
+
+class Profile(object):
+    """wall and cpu seconds of phases, counters and optional tracemalloc peak of one operation.
+    engine marks phases by "with Profile.phase(name)" and counts by Profile.count, both return at once
+    unless a profile is entered, so disabled profiling costs a call per phase. phases may nest, time of nested
+    phase is included in outer one. one profile is entered at a time"""
+
+    current = None
+
+    def __init__(self, name, memory=False):
+        self.name = name
+        self.memory = memory
+        self.phases = collections.OrderedDict()  # name: [wall, cpu, calls]
+        self.counters = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.wall = self.cpu = 0.0
+        self.peak = None    # bytes of python allocations
+        self.started = None
+
+    def __enter__(self):
+        Profile.current = self
+        self.started = time.perf_counter(), time.process_time()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        else:
+            self.memory = False
+        return self
+
+    def __exit__(self, *exc_info):
+        Profile.current = None
+        self.wall = time.perf_counter() - self.started[0]
+        self.cpu = time.process_time() - self.started[1]
+        if self.memory:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return False
+
+    @classmethod
+    def phase(cls, name):
+        profile = cls.current
+        if profile is None:
+            return _NO_PHASE
+        return _Phase(profile, name)
+
+    @classmethod
+    def count(cls, name, value=1):
+        profile = cls.current
+        if profile is None:
+            return
+        with profile.lock:
+            profile.counters[name] = profile.counters.get(name, 0) + value
+
+    def as_dict(self):
+        return collections.OrderedDict((
+            ("name", self.name), ("wall", round(self.wall, 6)), ("cpu", round(self.cpu, 6)),
+            ("peak_mb", None if self.peak is None else round(self.peak / 2 ** 20, 3)),
+            ("phases", collections.OrderedDict((name, {"wall": round(wall, 6), "cpu": round(cpu, 6), "calls": calls})
+                                               for name, (wall, cpu, calls) in self.phases.items())),
+            ("counters", self.counters)))
+
+    def save(self, file_name):
+        with open(file_name, "w", encoding="utf-8") as file:
+            json.dump(self.as_dict(), file, indent=2)
+
+    def report(self):
+        """text of "svg profile" block"""
+        text = ["%s: %.3f s wall, %.3f s cpu" % (self.name, self.wall, self.cpu)]
+        if self.peak is not None:
+            text.append("peak python memory: %.1f MB" % (self.peak / 2 ** 20))
+        if self.phases:
+            text.append("")
+            text.append("%-20s %10s %10s %6s %6s" % ("phase", "wall s", "cpu s", "wall%", "calls"))
+        for name, (wall, cpu, calls) in self.phases.items():
+            text.append("%-20s %10.3f %10.3f %6.1f %6i" % (name, wall, cpu, 100 * wall / (self.wall or 1), calls))
+        if self.counters:
+            text.append("")
+            for name, value in self.counters.items():
+                text.append("%-20s %10i" % (name, value))
+        return "\n".join(text)
+
+
+class _Phase(object):
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter(), time.process_time()
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.started[0]
+        cpu = time.process_time() - self.started[1]
+        with self.profile.lock:
+            phase = self.profile.phases.setdefault(self.name, [0.0, 0.0, 0])
+            phase[0] += wall
+            phase[1] += cpu
+            phase[2] += 1
+        return False
+
+
+class _NoPhase(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+def read_chunks(file_name, chunk_size, binary=False, use_mmap=False):
+    """yield file by chunks of chunk_size bytes, decoded as utf-8 text file unless binary.
+    with use_mmap chunks are sliced from memory map instead of read calls"""
+
+    decoder = None
+    if not binary:
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+    with open(file_name, "rb") as source:
+        view = None
+        size = os.fstat(source.fileno()).st_size
+        stage = "reading %s" % os.path.basename(file_name)
+        if use_mmap and size:
+            view = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            position = 0
+            while True:
+                if view is not None:
+                    chunk = view[position:position + chunk_size]
+                else:
+                    chunk = source.read(chunk_size)
+                position += len(chunk)
+                if not chunk:
+                    break
+                Job.progress(stage, position, size, True)
+                yield chunk if decoder is None else decoder.decode(chunk)
+            if decoder is not None:
+                chunk = decoder.decode(b"", True)
+                if chunk:
+                    yield chunk
+        finally:
+            if view is not None:
+                view.close()
+
+
+# attributes with values repeated all over icon sheets, shared between tags
+SHARED_VALUES = frozenset(("style", "class", "fill", "stroke", "stroke-width", "opacity", "width", "height", "r",
+                           "rx", "ry", "inkscape:groupmode", "inkscape:connector-curvature", "sodipodi:nodetypes"))
+
+
 class TagUnit(object):
-    """container for svg tag"""
+    """container for svg tag.
+    attributes are kept as flat (name, value, ...) tuple until attrs is taken for change,
+    text is collected into list and joined once, leaf has no children list"""
+
+    __slots__ = ("tag", "_attrs", "_data", "_children")
 
     def __init__(self, tag, attrs):
-        self.tag = tag
-        self.attrs = dict(attrs)
-        self.data = ""
-        self.children = []
+        self.tag = sys.intern(tag)
+        if isinstance(attrs, dict):
+            attrs = attrs.items()
+        flat = []
+        for key, value in attrs:
+            flat.append(sys.intern(key))
+            flat.append(sys.intern(value) if key in SHARED_VALUES and value else value)
+        self._attrs = tuple(flat)
+        self._data = ""
+        self._children = ()
+
+    @classmethod
+    def from_flat(cls, tag, flat):
+        """tag from flat [name, value, ...] list with already shared names, as expat gives them"""
+        tag_unit = cls.__new__(cls)
+        tag_unit.tag = tag
+        for i in range(0, len(flat), 2):
+            if flat[i] in SHARED_VALUES and flat[i + 1]:
+                flat[i + 1] = sys.intern(flat[i + 1])
+        tag_unit._attrs = tuple(flat)
+        tag_unit._data = ""
+        tag_unit._children = ()
+        return tag_unit
+
+    @property
+    def attrs(self):
+        """attributes dict, changes are kept"""
+        attrs = self._attrs
+        if attrs.__class__ is tuple:
+            attrs = self._attrs = dict(zip(attrs[::2], attrs[1::2]))
+        return attrs
+
+    @attrs.setter
+    def attrs(self, attrs):
+        self._attrs = dict(attrs)
+
+    @property
+    def data(self):
+        data = self._data
+        if data.__class__ is list:
+            data = self._data = "".join(data)
+        return data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
+    @property
+    def children(self):
+        children = self._children
+        if children.__class__ is tuple:
+            children = self._children = list(children)
+        return children
+
+    @children.setter
+    def children(self, children):
+        self._children = children
+
+    def get_attr(self, key, default=None):
+        """attribute value without making attrs dict"""
+        attrs = self._attrs
+        if attrs.__class__ is tuple:
+            for i in range(0, len(attrs), 2):
+                if attrs[i] == key:
+                    return attrs[i + 1]
+            return default
+        return attrs.get(key, default)
+
+    def attr_items(self):
+        """(name, value) pairs without making attrs dict"""
+        attrs = self._attrs
+        if attrs.__class__ is tuple:
+            return zip(attrs[::2], attrs[1::2])
+        return attrs.items()
+
+    def add_child(self, child):
+        if self._children.__class__ is tuple:
+            self._children = [child]
+        else:
+            self._children.append(child)
+
+    def add_data(self, data):
+        if not data.strip():  # indentation repeats all over the file
+            data = sys.intern(data)
+        current = self._data
+        if current.__class__ is list:
+            current.append(data)
+        elif current:
+            self._data = [current, data]
+        else:
+            self._data = data
 
     def string(self, offset=0):
         """convert back to html"""
+        stream = io.StringIO()
+        self.write(stream, offset)
+        return stream.getvalue()
+
+    def template(self, slot):
+        """text before and after children of slot tag and children offset.
+        tree with any slot children is written as prefix + children joined by new line + suffix"""
+
+        marker = "<\0slot></\0slot>"
+        children = slot._children
+        slot._children = [TagUnit("\0slot", ())]
+        try:
+            text = self.string()
+        finally:
+            slot._children = children
+        i = text.index(marker)
+        prefix = text[:i].rstrip(" ")
+        return prefix, text[i + len(marker):], i - len(prefix)
+
+    def write(self, stream, offset=0):
+        """write html of string() into stream. tree is walked with explicit stack, text is written by blocks"""
+
+        pieces = []
+        append = pieces.append
+        stack = [(self, offset)]
+        push = stack.append
+        pop = stack.pop
+        indents = {}
+        while stack:
+            item = pop()
+            if item.__class__ is str:  # separator or closing tag
+                append(item)
+                continue
 
-        result = "%s<%s" % (" " * offset, self.tag)
-        attrs = []
-        for key, value in self.attrs.items():
-            attrs.append("%s%s=\"%s\"" % (" " * (offset + 3), key, value))
+            tag, offset = item
+            indent = indents.get(offset)
+            if indent is None:
+                indent = indents[offset] = (" " * offset, " " * (offset + 3))
+            append("%s<%s" % (indent[0], tag.tag))
+            for key, value in tag.attr_items():
+                append("\n%s%s=\"%s\"" % (indent[1], key, value))
+            append(">")
+
+            children = tag._children
+            if children:
+                append("\n")
+                push("</%s>" % tag.tag)
+                offset += 3
+                push((children[-1], offset))
+                for i in range(len(children) - 2, -1, -1):
+                    push("\n")
+                    push((children[i], offset))
+            else:
+                data = tag.data
+                if data:
+                    append(data)
+                append("</%s>" % tag.tag)
 
-        if attrs:
-            result += "\n%s>" % "\n".join(attrs)
-        else:
-            result += ">"
-
-        children = []
-        for child in self.children:
-            children.append("%s" % child.string(offset + 3))
-        if children:
-            result += "\n%s</%s>" % ("\n".join(children), self.tag)
-        elif self.data:
-            result += "%s</%s>" % (self.data, self.tag)
-        else:
-            result += "</%s>" % self.tag
-
-        return result
+            if len(pieces) > 8192:
+                stream.write("".join(pieces))
+                del pieces[:]
+        stream.write("".join(pieces))
 
 
 class HTMLParser(_markupbase.ParserBase):
@@ -165,6 +618,7 @@ class HTMLParser(_markupbase.ParserBase):
     def reset(self):
         """Reset this instance.  Loses all unprocessed data."""
         self.rawdata = ''
+        self._pending = []
         self.lasttag = '???'
         self.interesting = interesting_normal
         self.cdata_elem = None
@@ -176,6 +630,14 @@ class HTMLParser(_markupbase.ParserBase):
         Call this as often as you want, with as little or as much text
         as you want (may include '\n').
         """
+        if self.rawdata[:1] == "<" and ">" not in data:
+            # unfinished markup needs ">", collect data instead of copying growing tail on every call
+            self._pending.append(data)
+            return
+        if self._pending:
+            self._pending.append(data)
+            data = "".join(self._pending)
+            self._pending = []
         self.rawdata = self.rawdata + data
         self.goahead(0)
 
@@ -539,20 +1001,193 @@ class HTMLParser(_markupbase.ParserBase):
         return unescape(s)
 
 
+class HTMLBackend(object):
+    """vendored pure python parser. slowest, but accepts malformed files"""
+
+    name = "html"
+    errors = ()
+
+    @classmethod
+    def available(cls):
+        return True
+
+    @classmethod
+    def parse(cls, builder, file_name):
+        for chunk in read_chunks(file_name, builder.CHUNK_SIZE, use_mmap=builder.MMAP):
+            builder.feed(chunk)
+
+
+class ExpatBackend(object):
+    """c parser of standard library. attribute whitespace and line ends are normalized as xml requires"""
+
+    name = "expat"
+    errors = (xml.parsers.expat.ExpatError,)
+
+    @classmethod
+    def available(cls):
+        return True
+
+    @classmethod
+    def parse(cls, builder, file_name):
+
+        def start_element(name, attrs):
+            builder.start_tag(from_flat(name, attrs))
+
+        from_flat = TagUnit.from_flat
+        p = xml.parsers.expat.ParserCreate()
+        p.ordered_attributes = 1
+        p.buffer_text = True
+        p.buffer_size = builder.CHUNK_SIZE
+        p.StartElementHandler = start_element
+        p.EndElementHandler = builder.handle_endtag
+        p.CharacterDataHandler = builder.handle_data
+
+        for chunk in read_chunks(file_name, builder.CHUNK_SIZE, binary=True, use_mmap=builder.MMAP):
+            p.Parse(chunk)
+        p.Parse(b"", 1)
+
+
+class LxmlBackend(object):
+    """libxml2 through lxml, if installed. namespaces are resolved by libxml2 and written back as prefixes.
+    libxml2 reads file by pieces itself, finished elements are cleared.
+    entities aren't resolved by libxml2, so external ones never read local files. internal entities of text are
+    expanded from internal dtd and external ones are skipped, as expat does"""
+
+    name = "lxml"
+    XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"    # bound to xml prefix without declaration
+    errors = (lxml_etree.XMLSyntaxError,) if lxml_etree is not None else ()
+
+    @classmethod
+    def available(cls):
+        return lxml_etree is not None
+
+    @staticmethod
+    def qualified_name(name, prefixes):
+        """{uri}local -> prefix:local, prefixes maps uri to prefix in scope"""
+        if name[:1] != "{":
+            return name
+        uri, local = name[1:].split("}", 1)
+        prefix = prefixes.get(uri)
+        return "%s:%s" % (prefix, local) if prefix else local
+
+    @classmethod
+    def parse(cls, builder, file_name):
+        qualified_name = cls.qualified_name
+        declared = []  # xmlns attributes of next element
+        xml_prefix = {cls.XML_NAMESPACE: "xml"}
+        scopes = [(dict(xml_prefix), dict(xml_prefix))]  # uri -> prefix for elements and for attributes in scope
+        entities = None     # name -> text of internal entities, read on first entity reference
+        for event, item in lxml_etree.iterparse(file_name, events=("start-ns", "start", "end"), huge_tree=True,
+                                                remove_comments=True, remove_pis=True, resolve_entities=False,
+                                                load_dtd=False, no_network=True):
+            if event == "start-ns":
+                prefix, uri = item
+                declared.append(("xmlns:%s" % prefix if prefix else "xmlns", uri))
+
+            elif event == "start":
+                elements, attributes = scopes[-1]
+                if declared:
+                    elements, attributes = dict(elements), dict(attributes)
+                    for key, uri in declared:
+                        prefix = key[6:]
+                        if not prefix:  # default namespace wins for elements
+                            for old_uri in [u for u, p in elements.items() if not p]:
+                                del elements[old_uri]
+                            elements[uri] = ""
+                        else:
+                            if elements.get(uri) != "":
+                                elements[uri] = prefix
+                            attributes[uri] = prefix
+                attrs = declared
+                declared = []
+                attrs.extend((qualified_name(key, attributes), value) for key, value in item.attrib.items())
+                scopes.append((elements, attributes))
+                builder.handle_starttag(qualified_name(item.tag, elements), attrs)
+
+            else:
+                data = [item.text] if item.text else []
+                for child in item:
+                    if child.tag is lxml_etree.Entity:
+                        if entities is None:
+                            dtd = item.getroottree().docinfo.internalDTD
+                            entities = {entity.name: entity.content or "" for entity in dtd.iterentities()} \
+                                if dtd is not None else {}
+                        data.append(entities.get(child.name, ""))
+                    if child.tail:
+                        data.append(child.tail)
+                if data:
+                    builder.handle_data("".join(data))
+                builder.handle_endtag(item.tag)
+                scopes.pop()
+                item.clear(keep_tail=True)
+
+
 class StructureBuilder(HTMLParser):
-    """creates tag based structure"""
+    """creates tag based structure.
+    backend is name from PARSER_BACKENDS, None takes BACKEND or fastest available one.
+    if backend fails on malformed file, the file is parsed again with tolerant html backend.
+    file is fed by CHUNK_SIZE pieces, read or sliced from memory map with MMAP, so only unparsed tail is kept.
+    with CACHE tree of unchanged file is taken from TreeCache and file isn't parsed at all"""
 
-    def __init__(self, file_name):
+    BACKEND = None
+    CHUNK_SIZE = 1024 * 1024
+    MMAP = False
+    CACHE = None
+
+    def __init__(self, file_name, backend=None):
         HTMLParser.__init__(self)
         self._queue = []  # structure that helps return
         self.root = []
         self.current_tag = None
-        self.feed(open(file_name, encoding="utf-8").read())
+
+        parser_backend = PARSER_BACKENDS[backend or self.BACKEND or self.default_backend()]
+        if not parser_backend.available():
+            raise ValueError("%s parser backend isn't available" % parser_backend.name)
+        cache = self.CACHE
+        if cache is not None:
+            kind = "tree " + parser_backend.name    # backends give slightly different trees
+            fingerprint = cache.fingerprint(file_name)
+            cached = cache.get(file_name, kind, fingerprint)
+            if cached is not None:
+                self.backend, packed = cached
+                with Profile.phase("parse"):
+                    self.root = TreeCache.unpack(packed)
+                return
+        with Profile.phase("parse"):
+            try:
+                parser_backend.parse(self, file_name)
+            except parser_backend.errors:
+                HTMLParser.reset(self)
+                self._queue = []
+                self.root = []
+                self.current_tag = None
+                parser_backend = HTMLBackend
+                parser_backend.parse(self, file_name)
+        self.backend = parser_backend.name
+        if cache is not None and cache.keeps(fingerprint[0]):
+            cache.put(file_name, kind, (self.backend, TreeCache.pack(self.root)), fingerprint)
+        if Profile.current is not None:
+            Profile.count("bytes in", os.path.getsize(file_name))
+            stack = list(self.root)
+            elements = 0
+            while stack:
+                elements += 1
+                stack.extend(stack.pop()._children)
+            Profile.count("elements parsed", elements)
+
+    @staticmethod
+    def default_backend():
+        """fastest available backend name"""
+        for name, parser_backend in PARSER_BACKENDS.items():
+            if parser_backend.available():
+                return name
 
     def handle_starttag(self, tag, attrs):
-        tag_unit = TagUnit(tag, attrs)
+        self.start_tag(TagUnit(tag, attrs))
+
+    def start_tag(self, tag_unit):
         if self.current_tag:
-            self.current_tag.children.append(tag_unit)
+            self.current_tag.add_child(tag_unit)
         self.current_tag = tag_unit
         self._queue.append(tag_unit)
 
@@ -568,48 +1203,206 @@ class StructureBuilder(HTMLParser):
         if "&t" in data:
             data = data.replace("&t", "&amp;")
         if self.current_tag:
-            self.current_tag.data += data
+            self.current_tag.add_data(data)
+
+
+# parser backends by measured speed, see benchmarks/bench_parse.py. lxml pays for converting its tree
+PARSER_BACKENDS = collections.OrderedDict((backend.name, backend) for backend in (ExpatBackend, LxmlBackend,
+                                                                                    HTMLBackend))
+
+
+class TreeCache(object):
+    """parsed trees and other parse results of files by fingerprint: path, size, mtime and with verify sha1 of content.
+    values are kept marshalled, so every get builds new tree which caller may change freely,
+    least recently used values are dropped when they take more than budget bytes.
+    with directory values are written there as marshal files too and outlive blender session"""
+
+    VERSION = (1,) + tuple(sys.version_info[:2])   # marshal format may change between python versions
+    HASH_BLOCK = 1024 * 1024
+
+    def __init__(self, budget=256 * 2 ** 20, directory=None, verify=False):
+        self.budget = budget
+        self.directory = directory
+        self.verify = verify
+        self.size = 0
+        self.values = collections.OrderedDict()     # (path, kind): (fingerprint, marshalled value)
+        self.lock = threading.Lock()
+
+    def fingerprint(self, file_name):
+        """(size, mtime) of file, with verify sha1 of content is added. take it before parsing the file"""
+
+        stat = os.stat(file_name)
+        if not self.verify:
+            return stat.st_size, stat.st_mtime_ns
+        file_hash = hashlib.sha1()
+        with open(file_name, "rb") as file:
+            for block in iter(lambda: file.read(self.HASH_BLOCK), b""):
+                file_hash.update(block)
+        return stat.st_size, stat.st_mtime_ns, file_hash.hexdigest()
+
+    def keeps(self, size):
+        """whether value of file of size bytes can be kept, marshalled tree takes about as much as source file.
+        lets caller skip packing value which would be dropped at once"""
+        return bool(self.directory) or size <= self.budget
+
+    def disk_name(self, key):
+        name = hashlib.sha1(("%s\0%s" % key).encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(self.directory, name + ".marshal")
+
+    def get(self, file_name, kind, fingerprint):
+        """value stored for file of the same fingerprint or None"""
+
+        key = (os.path.abspath(file_name), kind)
+        with self.lock:
+            stored = self.values.get(key)
+            if stored is not None and stored[0] == fingerprint:
+                self.values.move_to_end(key)
+                Profile.count("cache hits")
+                return marshal.loads(stored[1])
+        if self.directory:
+            try:
+                with open(self.disk_name(key), "rb") as file:
+                    version, stored_key, stored_fingerprint, data = marshal.loads(file.read())
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+            else:
+                if version == self.VERSION and stored_key == key and stored_fingerprint == fingerprint:
+                    self.keep(key, fingerprint, data)
+                    Profile.count("cache hits")
+                    return marshal.loads(data)
+        Profile.count("cache misses")
+        return None
+
+    def put(self, file_name, kind, value, fingerprint):
+        """store value made of tuples, lists, strings and numbers for file of fingerprint"""
+
+        key = (os.path.abspath(file_name), kind)
+        data = marshal.dumps(value)
+        self.keep(key, fingerprint, data)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            disk_name = self.disk_name(key)
+            with open(disk_name + ".part", "wb") as file:
+                file.write(marshal.dumps((self.VERSION, key, fingerprint, data)))
+            os.replace(disk_name + ".part", disk_name)
+
+    def keep(self, key, fingerprint, data):
+        with self.lock:
+            stored = self.values.pop(key, None)
+            if stored is not None:
+                self.size -= len(stored[1])
+            if len(data) > self.budget:
+                return
+            self.values[key] = (fingerprint, data)
+            self.size += len(data)
+            while self.size > self.budget:
+                self.size -= len(self.values.popitem(last=False)[1][1])
+
+    def clear(self):
+        """drop values kept in memory, files of directory stay"""
+        with self.lock:
+            self.values.clear()
+            self.size = 0
+
+    @staticmethod
+    def pack(roots):
+        """nested (tag, flat attributes, text, children) tuples of trees, marshal stores them fast and compact"""
+
+        values = []
+        stack = [(tag_unit, False) for tag_unit in reversed(roots)]
+        while stack:
+            tag_unit, done = stack.pop()
+            if not done:
+                stack.append((tag_unit, True))
+                stack.extend((child, False) for child in reversed(tag_unit._children))
+                continue
+            attrs = tag_unit._attrs
+            if attrs.__class__ is not tuple:
+                attrs = tuple(itertools.chain.from_iterable(attrs.items()))
+            count = len(tag_unit._children)
+            children = tuple(values[len(values) - count:]) if count else ()
+            if count:
+                del values[len(values) - count:]
+            values.append((tag_unit.tag, attrs, tag_unit.data, children))
+        return tuple(values)
 
+    @staticmethod
+    def unpack(packed):
+        """list of TagUnit trees from pack result"""
+
+        roots = [TagUnit.__new__(TagUnit) for _ in packed]
+        stack = list(zip(roots, packed))
+        while stack:
+            tag_unit, (tag, attrs, data, children) = stack.pop()
+            tag_unit.tag = tag
+            tag_unit._attrs = attrs
+            tag_unit._data = data
+            if children:
+                tag_unit._children = [TagUnit.__new__(TagUnit) for _ in children]
+                stack.extend(zip(tag_unit._children, children))
+            else:
+                tag_unit._children = ()
+        return roots
 
-class SVGSplit(bpy.types.Operator):
-    """splitter for xml. ported from someone code. literally I dunno how it works"""
 
-    bl_idname = "mesh.am1dsvg_svg_split"
-    bl_label = "SVG inout split"
-    bl_options = {'REGISTER', 'UNDO'}
+class SVGSplit(object):
+    """splitter for xml. ported from someone code. literally I dunno how it works.
+    every file is split by its own instance with own expat parser and state, so files are split concurrently.
+    part is serialized into utf-8 byte buffer, so its size is exact. when next cut point would make part larger than
+    max size, part is cut at previous one. parts don't exceed max size unless text between two cut points is larger"""
 
     # How much data we process at a time
     CHUNK_SIZE = 1024 * 1024
-
-    # The sequence of element leading us to the current one
-    path = []
-
-    # How far we are in the current file
-    cur_size = 0
-    # From how much should we start another file
-    MAX_SIZE = 1024 * 1024  # 1Mb
-
-    # The current index
-    cur_idx = 0
-    # The current file handle we are writing to
-    cur_file = None
+    # How much data is collected before writing to file
+    FLUSH_SIZE = 256 * 1024
 
     # The format string used to introduce the index in the file to be written
-    FMT = ".%d"
-
-    # The filename we are playing with
-    out_dir = None
-    root = None
-    ext = None
-
-    # The xml declaration of the file.
-    xml_declaration = None
-
-    # What was the signature of the last start element
-    start = None
-
-    # if we are currently in the process of changing file
-    ending = False
+    FMT = "_split_%.3i"
+
+    # Start tag in source bytes, attribute values may contain > and /
+    START_TAG = re.compile(br"""<([^\s/>]+)(?:\s+[^\s=]+\s*=\s*(?:"[^"]*"|'[^']*'))*\s*(/?)>""")
+
+    def __init__(self, max_size=1024 * 1024, out_dir=None, passthrough=False):
+        # The sequence of element leading us to the current one
+        self.path = []
+        # Bytes of closing tags of path
+        self.closing_size = 0
+
+        # Bytes of current part already written to file
+        self.written = 0
+        # Bytes of current part not written yet
+        self.buffer = bytearray()
+        # Last place where part can be cut: buffer position, path and its closing size
+        self.safe = None
+        # From how much should we start another file
+        self.max_size = max_size
+
+        # The current index
+        self.cur_idx = 0
+        # The current file handle we are writing to
+        self.cur_file = None
+        # Names of written files
+        self.parts = []
+
+        # The filename we are playing with
+        self.out_dir = out_dir
+        self.root = None
+        self.ext = None
+
+        # The xml declaration of the file.
+        self.xml_declaration = None
+
+        # What was the signature of the last start element
+        self.start = None
+
+        # Copy byte ranges of source instead of serializing, see split_passthrough
+        self.passthrough = passthrough
+        self.data = None
+        self.parser = None
+        self.prolog = None
+        self.head = b""
+        self.part_start = 0
+        self.leaf = None
 
     @staticmethod
     def attrs_s(attrs):
@@ -619,96 +1412,108 @@ class SVGSplit(bpy.types.Operator):
             data.append('%s="%s"' % (attrs[i], escape(attrs[i + 1])))
         return ' '.join(data)
 
-    @classmethod
-    def next_file(cls):
-        """ This makes the decision to cut the current file and starta new one """
-
-        if (not cls.ending) and (cls.cur_size > cls.MAX_SIZE):
-            # size above threshold, and not already cls.ending
-
-            cls.ending = True
-            # Close the current elements
-            for elem in reversed(cls.path):
-                cls.end_element(elem[0])
-            # Close the file
-            cls.cur_file.close()
-            # reset the size
-            cls.cur_size = 0
+    def open_part(self):
+        self.parts.append(os.path.join(self.out_dir, self.root + self.FMT % self.cur_idx + self.ext))
+        self.cur_file = open(self.parts[-1], 'wb')
+        self.written = 0
+
+    def write(self, text):
+        self.buffer += text.encode("utf-8")
+
+    def flush(self):
+        """write buffer till last cut point into file"""
+        position, path, closing_size = self.safe
+        self.cur_file.write(self.buffer[:position])
+        del self.buffer[:position]
+        self.written += position
+        self.safe = (0, path, closing_size)
+
+    def next_file(self):
+        """ This is called where file can be cut, no start tag is waiting for its end.
+        part is cut at previous such place if it would be larger than max size with closing tags of path """
+
+        # end of root isn't cut off into part of its own
+        if self.safe is not None and self.path and \
+                self.written + len(self.buffer) + self.closing_size > self.max_size:
+            position, path, closing_size = self.safe
+            tail = self.buffer[position:]
+            del self.buffer[position:]
+            # Close the elements open at cut point
+            self.write(''.join('</%s>' % elem[0] for elem in reversed(path)))
+            self.cur_file.write(self.buffer)
+            self.cur_file.close()
             # Open another file
-            cls.cur_idx += 1
-            cls.cur_file = open(os.path.join(cls.out_dir, cls.root + cls.FMT % cls.cur_idx + cls.ext), 'wt', encoding="utf-8")
-            if cls.xml_declaration is not None:
-                cls.cur_file.write('<?xml%s?>\n' % cls.attrs_s(cls.xml_declaration))
+            self.buffer = bytearray()
+            self.cur_idx += 1
+            self.open_part()
+            if self.xml_declaration is not None:
+                self.write('<?xml%s?>\n' % self.attrs_s(self.xml_declaration))
             # Start again where we stopped
-            for elem in cls.path:
-                cls.start_element(*elem)
-            # We are done 'cls.ending'
-            cls.ending = False
+            self.write(''.join('<%s%s>' % (elem[0], self.attrs_s(elem[1])) for elem in path))
+            self.buffer += tail
 
-    @classmethod
-    def xml_decl(cls, version, encoding, standalone):
+        self.safe = (len(self.buffer), self.path[:], self.closing_size)
+        if len(self.buffer) >= self.FLUSH_SIZE:
+            self.flush()
+
+    def xml_decl(self, version, encoding, standalone):
         data = ['version', version, 'encoding', encoding]
         if standalone != -1:
             data.extend(['standalone', 'yes' if standalone else 'no'])
-        cls.xml_declaration = data
-        cls.cur_file.write('<?xml%s?>\n' % cls.attrs_s(cls.xml_declaration))
+        self.xml_declaration = data
+        self.write('<?xml%s?>\n' % self.attrs_s(self.xml_declaration))
 
-    @classmethod
-    def start_element(cls, name, attrs):
+    def start_element(self, name, attrs):
         """ Called by the parser when he meet a start element """
-        if cls.start is not None:
+        if self.start is not None:
             # Chaining starts after each others
-            cls.cur_file.write('<%s%s>' % (cls.start[0], cls.attrs_s(cls.start[1])))
-        cls.start = (name, attrs)
-        if cls.ending:
-            return
-        cls.cur_size += len(name) + sum(len(k) for k in attrs)
-        cls.path.append((name, attrs))
+            self.write('<%s%s>' % (self.start[0], self.attrs_s(self.start[1])))
+        self.start = (name, attrs)
+        self.path.append((name, attrs))
+        self.closing_size += len(name.encode("utf-8")) + 3
 
-    @classmethod
-    def end_element(cls, name):
+    def end_element(self, name):
         """ Caled by the parser when he meet an end element """
 
-        if cls.start is not None:
+        if self.start is not None:
             # Empty element, good, we did not wrote the start part
-            cls.cur_file.write('<%s%s/>' % (cls.start[0], cls.attrs_s(cls.start[1])))
+            self.write('<%s%s/>' % (self.start[0], self.attrs_s(self.start[1])))
         else:
             # There was some data, close it normaly
-            cls.cur_file.write('</%s>' % name)
-        cls.start = None
-        if cls.ending:
-            return
-        elem = cls.path.pop()
+            self.write('</%s>' % name)
+        self.start = None
+        elem = self.path.pop()
         assert elem[0] == name
-        cls.cur_size += len(name)
-        cls.next_file()
+        self.closing_size -= len(name.encode("utf-8")) + 3
+        self.next_file()
 
-    @classmethod
-    def char_data(cls, data):
+    def char_data(self, data):
         """ Called by the parser when he meet data """
 
         wroteStart = False
-        if cls.start is not None:
+        if self.start is not None:
             # The data belong to an element, we should write the start part first
-            cls.cur_file.write('<%s%s>' % (cls.start[0], cls.attrs_s(cls.start[1])))
-            cls.start = None
+            self.write('<%s%s>' % (self.start[0], self.attrs_s(self.start[1])))
+            self.start = None
             wroteStart = True
         # ``escape`` is too much for us, only & and < ned to be escaped there ...
         data = data.replace('&', '&amp;')
         data = data.replace('<', '&lt;')
         if data == '>':
             data = '&gt;'
-        cls.cur_file.write(data)
-        cls.cur_size += len(data)
+        self.write(data)
         if not wroteStart:
             # The data was outside of an element, it could be the right moment to
             # make the split
-            cls.next_file()
+            self.next_file()
 
-    @classmethod
-    def main(cls, filename_source, max_size, output_dir=None):
-        # Create a parser
+    def split(self, filename_source):
+        """split file into parts in out_dir, input directory by default. returns names of parts"""
+
+        if self.passthrough:
+            return self.split_passthrough(filename_source)
 
+        # Create a parser
         p = xml.parsers.expat.ParserCreate()
         # We want to reproduce the input, so we are interested in the order of the
         # attributess
@@ -716,239 +1521,858 @@ class SVGSplit(bpy.types.Operator):
 
         # Set our callbacks (we are stripping comments out by not defining
         # callbacks for them)
-        p.XmlDeclHandler = cls.xml_decl
-        p.StartElementHandler = cls.start_element
-        p.EndElementHandler = cls.end_element
-        p.CharacterDataHandler = cls.char_data
-
-        cls.cur_idx = 0
-        cls.MAX_SIZE = max_size
-        cls.FMT = "_split_%.3i"
-
-        cls.out_dir, filename = os.path.split(filename_source)
-        if output_dir is not None:
-            cls.out_dir = output_dir
-
-        cls.root, cls.ext = os.path.splitext(filename)
-
-        cls.cur_file = open(os.path.join(cls.out_dir, cls.root + cls.FMT % cls.cur_idx + cls.ext), 'wt',
-                            encoding="utf-8")
-
-        with open(filename_source, "rt", encoding="utf-8") as xml_file:
-            while True:
-                # Read a chunk
-                chunk = xml_file.read(cls.CHUNK_SIZE)
-                if len(chunk) < cls.CHUNK_SIZE:
-                    # End of file
-                    # tell the parser we're done
-                    p.Parse(chunk, 1)
-                    # exit the loop
-                    break
-                # process the chunk
-                p.Parse(chunk)
+        p.XmlDeclHandler = self.xml_decl
+        p.StartElementHandler = self.start_element
+        p.EndElementHandler = self.end_element
+        p.CharacterDataHandler = self.char_data
+
+        directory, filename = os.path.split(filename_source)
+        if self.out_dir is None:
+            self.out_dir = directory
+
+        self.root, self.ext = os.path.splitext(filename)
+        self.open_part()
+
+        try:
+            with open(filename_source, "rt", encoding="utf-8") as xml_file:
+                size = os.fstat(xml_file.fileno()).st_size
+                while True:
+                    # Read a chunk
+                    chunk = xml_file.read(self.CHUNK_SIZE)
+                    if len(chunk) < self.CHUNK_SIZE:
+                        # End of file
+                        # tell the parser we're done
+                        p.Parse(chunk, 1)
+                        # exit the loop
+                        break
+                    # process the chunk
+                    p.Parse(chunk)
+                    Job.progress("splitting %s" % filename, xml_file.buffer.tell(), size, True)
+            self.cur_file.write(self.buffer)
+        except JobCancelled:
+            self.remove_part()
+            raise
+        finally:
+            # Don't forget to close our handle
+            self.cur_file.close()
+        return self.parts
+
+    def remove_part(self):
+        """remove unfinished part of cancelled split, finished parts are well formed"""
+        self.cur_file.close()
+        os.remove(self.parts.pop())
 
-        # Don't forget to close our handle
-        cls.cur_file.close()
+    @classmethod
+    def element_end(cls, data, start, index, leaf):
+        """offset after element starting at start, index - CurrentByteIndex of its end event.
+        expat points after empty element tag and at the end tag of element with content,
+        start tag is checked only when text of element may end with />"""
+
+        if leaf and data[index - 2:index] == b"/>":
+            if data[index:index + 2] != b"</":
+                return index
+            match = cls.START_TAG.match(data, start)
+            if match is not None and match.group(2) and match.end() == index:
+                return index
+        return data.find(b">", index) + 1
+
+    def passthrough_start(self, name, attrs):
+        if not self.path and self.prolog is None:
+            self.prolog = self.data[:self.parser.CurrentByteIndex]
+        self.leaf = self.parser.CurrentByteIndex
+        self.path.append(self.leaf)
+        self.closing_size += len(name.encode("utf-8")) + 3
+
+    def passthrough_end(self, name):
+        index = self.parser.CurrentByteIndex
+        start = self.path.pop()
+        self.closing_size -= len(name.encode("utf-8")) + 3
+        end = self.element_end(self.data, start, index, self.leaf == start)
+        self.leaf = None
+
+        # same cut decision as next_file, positions are offsets of source
+        if self.safe is not None and self.path and \
+                len(self.head) + end - self.part_start + self.closing_size > self.max_size:
+            position, path, closing_size = self.safe
+            tags = [self.START_TAG.match(self.data, offset) for offset in path]
+            self.cur_file.write(self.head)
+            self.cur_file.write(memoryview(self.data)[self.part_start:position])
+            self.cur_file.write(b"".join(b"</" + tag.group(1) + b">" for tag in reversed(tags)))
+            self.cur_file.close()
+            self.cur_idx += 1
+            self.open_part()
+            self.head = self.prolog + b"".join(tag.group(0) for tag in tags)
+            self.part_start = position
+        self.safe = (end, self.path[:], self.closing_size)
+
+    def split_passthrough(self, filename_source):
+        """split file by copying byte ranges of source, only ancestors of cut point are written again.
+        expat gets raw bytes, text isn't decoded and serialized, comments are kept. file is read by memory map.
+        source must be in ascii compatible encoding like utf-8. parts are cut after end tags only"""
+
+        directory, filename = os.path.split(filename_source)
+        if self.out_dir is None:
+            self.out_dir = directory
+        self.root, self.ext = os.path.splitext(filename)
+
+        self.parser = p = xml.parsers.expat.ParserCreate()
+        p.StartElementHandler = self.passthrough_start
+        p.EndElementHandler = self.passthrough_end
+
+        with open(filename_source, "rb") as xml_file:
+            if os.fstat(xml_file.fileno()).st_size:
+                self.data = mmap.mmap(xml_file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = b""
+        self.open_part()
+        try:
+            for i in range(0, len(self.data), self.CHUNK_SIZE):
+                p.Parse(self.data[i:i + self.CHUNK_SIZE])
+                Job.progress("splitting %s" % filename, min(i + self.CHUNK_SIZE, len(self.data)), len(self.data),
+                             True)
+            p.Parse(b"", 1)
+            self.cur_file.write(self.head)
+            self.cur_file.write(memoryview(self.data)[self.part_start:])
+        except JobCancelled:
+            self.remove_part()
+            raise
+        finally:
+            self.cur_file.close()
+            if isinstance(self.data, mmap.mmap):
+                self.data.close()
+        return self.parts
 
-    def execute(self, context):
+    @classmethod
+    def main(cls, filename_source, max_size, output_dir=None, passthrough=False):
+        """split one file by new splitter, returns names of parts"""
+        return cls(max_size, output_dir, passthrough).split(filename_source)
 
-        max_size = context.scene.amsvg_settings.svg_size * 2 ** 20  # convert mb to bytes
-        directory = context.scene.amsvg_settings.svg_input
+    @classmethod
+    def run(cls, input_name, output_name, max_size, workers=1, passthrough=False, pool="process"):
+        """split svg file or every svg file of directory not smaller than max_size bytes.
+        relative output is taken from input file directory, empty output means input directory.
+        files of directory are split by workers processes or threads of pool, one file per task,
+        0 workers is cpu count. blender needs thread pool, its sys.executable isn't python to spawn processes.
+        passthrough copies byte ranges of source instead of serializing elements again.
+        returns (file, names of parts) in order of files"""
 
         # load all files from directory
-        if os.path.isdir(directory):
-            files = [os.path.join(directory, f).replace("\\", "/") for f in os.listdir(directory)
-                     if f.endswith('.svg') and os.path.getsize(os.path.join(directory, f)) >= max_size]
+        if os.path.isdir(input_name):
+            files = [os.path.join(input_name, f).replace("\\", "/") for f in sorted(os.listdir(input_name))
+                     if f.endswith('.svg') and os.path.getsize(os.path.join(input_name, f)) >= max_size]
 
-        elif os.path.isfile(directory) and directory.endswith('.svg') and os.path.getsize(directory) >= max_size:
-            files = [directory.replace("\\", "/")]
+        elif os.path.isfile(input_name) and input_name.endswith('.svg') and os.path.getsize(input_name) >= max_size:
+            files = [input_name.replace("\\", "/")]
         else:
-            return {"FINISHED"}
-
-        if not os.path.isdir(context.scene.amsvg_settings.svg_output):
-            try:
-                os.makedirs(context.scene.amsvg_settings.svg_output, exist_ok=True)
-            except (TypeError, FileNotFoundError):
-                return {"FINISHED"}
+            return []
 
+        out_dirs = []
         for filename in files:
-            filename = filename.replace("\\", "/")
-            out_dir = context.scene.amsvg_settings.svg_output.replace("\\", "/")
-            if os.path.isabs(out_dir):
-                os.makedirs(out_dir, exist_ok=True)
+            out_dir = (output_name or "").replace("\\", "/")
+            if not os.path.isabs(out_dir):
+                out_dir = os.path.normpath(os.path.join(os.path.dirname(filename), out_dir))
+            os.makedirs(out_dir, exist_ok=True)
+            out_dirs.append(out_dir)
+
+        workers = workers or os.cpu_count() or 1
+        with Profile.phase("split"):
+            if workers == 1 or len(files) < 2:
+                parts = [cls.main(filename, max_size, out_dir, passthrough)
+                         for filename, out_dir in zip(files, out_dirs)]
             else:
-                dir_list = [p for p in filename.split("/")[:-1] if p]
-                out_list = [p for p in out_dir.split("/") if p]
-                while out_list[0] == "..":
-                    dir_list.pop(-1)
-                    out_list.pop(0)
-                out_dir = os.path.join(*dir_list, *out_list)
-                out_dir = out_dir[:2] + "/" + out_dir[2:]
-            self.main(filename, max_size, out_dir)
-
-        return {"FINISHED"}
-
-
-class SVGMerge(bpy.types.Operator):
-    """splitter for xml. ported from someone code. literally I dunno how it works"""
+                executor_class = concurrent.futures.ProcessPoolExecutor if pool == "process" else \
+                    concurrent.futures.ThreadPoolExecutor
+                with executor_class(min(workers, len(files))) as executor:
+                    futures = [executor.submit(cls.main, filename, max_size, out_dir, passthrough)
+                               for filename, out_dir in zip(files, out_dirs)]
+                    try:
+                        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                            Job.progress("files split", i + 1, len(files))
+                    except JobCancelled:
+                        Job.cancel_futures(futures)
+                        raise
+                    parts = [future.result() for future in futures]
+        if Profile.current is not None:
+            Profile.count("files split", len(files))
+            Profile.count("bytes in", sum(os.path.getsize(filename) for filename in files))
+            Profile.count("parts written", sum(len(names) for names in parts))
+            Profile.count("bytes out", sum(os.path.getsize(name) for names in parts for name in names))
+        return list(zip(files, parts))
+
+
+class SVGMerge(object):
+    """merge svg parts back into one file. parts are taken in natural order of names, so _split_010 follows _split_009.
+    body of every part is copied from memory map straight into output, no part is held in memory.
+    with dedupe identical definitions of all parts are kept once and references are pointed to the kept copy"""
+
+    SVG_START = re.compile(br"<svg[\s/>]")
+    BLOCK_SIZE = 1024 * 1024
+    # url(#id), xlink:href="#id" and href="#id"
+    REFERENCE = re.compile(br"""(url\(\s*["']?#|href\s*=\s*["']#)([^)"'\s]+)""")
+    ID = re.compile(br"""(\sid\s*=\s*["'])([^"']*)(["'])""")
 
-    bl_idname = "mesh.am1dsvg_svg_merge"
-    bl_label = "SVG output merge"
-    bl_options = {'REGISTER', 'UNDO'}
+    @staticmethod
+    def natural_key(name):
+        return [int(text) if text.isdigit() else text.lower() for text in re.split(r"(\d+)", name)]
 
-    def execute(self, context):
-        prefix = ""
-        all_data = ""
+    @staticmethod
+    def definitions(data):
+        """(start, end, id) byte ranges of children of defs elements, children without id are left alone"""
+
+        parser = xml.parsers.expat.ParserCreate()
+        stack = []  # name, start offset, id
+        found = []
+        last_start = [None]
+
+        def start_element(name, attrs):
+            last_start[0] = parser.CurrentByteIndex
+            stack.append((name, parser.CurrentByteIndex, attrs.get("id")))
+
+        def end_element(name):
+            name, start, element_id = stack.pop()
+            if element_id and stack and stack[-1][0].rsplit(":", 1)[-1] == "defs":
+                end = SVGSplit.element_end(data, start, parser.CurrentByteIndex, last_start[0] == start)
+                found.append((start, end, element_id))
+            last_start[0] = None
+
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        for i in range(0, len(data), SVGSplit.CHUNK_SIZE):
+            parser.Parse(data[i:i + SVGSplit.CHUNK_SIZE])
+        parser.Parse(b"", 1)
+        return found
 
-        for file in os.listdir(context.scene.amsvg_settings.svg_output):
-            if os.path.splitext(file)[1].lower() != ".svg":
-                continue
-            file = os.path.join(context.scene.amsvg_settings.svg_output, file)
-            with open(file, encoding="utf-8") as svg_file:
-                data = svg_file.read()
-            i = data.find("<svg")
-            j = data.find(">", i)
-            m = data.find("</svg>")
-            if -1 in (i, j, m):
+    @staticmethod
+    def dependency_order(references):
+        """indices of definitions, each after definitions it references, and set of those inside reference cycles.
+        references - list of referenced indices of every definition"""
+
+        order = []
+        cyclic = set()
+        state = [0] * len(references)  # 0 - new, 1 - on path, 2 - ordered
+        for root in range(len(references)):
+            if state[root]:
                 continue
-            if not prefix:
-                prefix = data[:j + 1]
-            all_data += data[j:m + 1]
+            state[root] = 1
+            path = [root]
+            iterators = [iter(references[root])]
+            while iterators:
+                for index in iterators[-1]:
+                    if state[index] == 0:
+                        state[index] = 1
+                        path.append(index)
+                        iterators.append(iter(references[index]))
+                        break
+                    if state[index] == 1:
+                        cyclic.update(path[path.index(index):])
+                else:
+                    iterators.pop()
+                    state[path[-1]] = 2
+                    order.append(path.pop())
+        return order, cyclic
 
-        if prefix:
-            with open(os.path.join(context.scene.amsvg_settings.svg_output, "MERGE.SVG"), "w", encoding="utf-8") as svg_file:
-                svg_file.write(prefix)
-                svg_file.write(all_data)
-                svg_file.write("</svg>")
+    @classmethod
+    def deduplicate(cls, data, start, end, kept, used_ids):
+        """body data[start:end] without definitions kept already, references point to kept copies.
+        kept - {hash of definition without ids: its ids in output}, used_ids - ids of kept definitions and of their
+        children, both shared by parts. definitions are hashed after definitions they reference, with references
+        to output ids, so equal hash means equal targets too. definitions of reference cycles are never merged.
+        ids of merged definition and its children point to ids of kept copy in the same order, ids of kept
+        definition and its children taken by other kept definition are renamed.
+        returns body and bytes of removed definitions"""
+
+        mapping = {}  # id of this part - id in output
+
+        def reference(match):
+            return match.group(1) + mapping.get(match.group(2), match.group(2))
+
+        definitions = [(def_start, def_end, [match.group(2) for match in cls.ID.finditer(data, def_start, def_end)])
+                       for def_start, def_end, def_id in cls.definitions(data)
+                       if def_start >= start and def_end <= end]
+        indices = {}  # id of definition or of its child - index of definition
+        for i, (def_start, def_end, ids) in enumerate(definitions):
+            indices.update((element_id, i) for element_id in ids)
+        references = []
+        for i, (def_start, def_end, ids) in enumerate(definitions):
+            targets = (indices.get(match.group(2)) for match in cls.REFERENCE.finditer(data, def_start, def_end))
+            references.append([target for target in targets if target is not None and target != i])
+        order, cyclic = cls.dependency_order(references)
+
+        replaced = {}  # index of definition - new text
+        saved = 0
+        for i in order:
+            def_start, def_end, old_ids = definitions[i]
+            text = data[def_start:def_end]
+            key = None
+            if i not in cyclic:
+                key = hashlib.sha1(cls.ID.sub(br"\1\3", cls.REFERENCE.sub(reference, text))).digest()
+                if key in kept:
+                    mapping.update(zip(old_ids, kept[key]))
+                    replaced[i] = b""
+                    saved += def_end - def_start
+                    continue
 
-        return {"FINISHED"}
+            new_ids = []
+            for old_id in old_ids:
+                new_id = old_id
+                number = 1
+                while new_id in used_ids:  # same id with other content
+                    new_id = old_id + b"-%i" % number
+                    number += 1
+                if new_id != old_id:
+                    mapping[old_id] = new_id
+                used_ids.add(new_id)
+                new_ids.append(new_id)
+            if new_ids != old_ids:
+                renamed = iter(new_ids)
+                replaced[i] = cls.ID.sub(lambda match: match.group(1) + next(renamed) + match.group(3), text)
+            if key is not None:
+                kept[key] = new_ids
+
+        body = []
+        position = start
+        for i in sorted(replaced):
+            def_start, def_end, ids = definitions[i]
+            body.append(data[position:def_start])
+            body.append(replaced[i])
+            position = def_end
+        body.append(data[position:end])
+        body = b"".join(body)
+        if mapping:
+            body = cls.REFERENCE.sub(reference, body)
+        return body, saved
 
+    @classmethod
+    def main(cls, directory, output_dir=None, dedupe=False):
+        """merge svg files of directory into MERGE.SVG. empty output means input directory.
+        root start tag of first part is kept, bodies of roots are joined. dedupe removes repeated definitions,
+        every part is held in memory then.
+        returns (output file, bytes of removed definitions, parts expat couldn't read for dedupe),
+        output file is None when directory has no svg parts"""
+
+        output_dir = output_dir or directory
+        output_name = os.path.join(output_dir, "MERGE.SVG")
+        files = sorted((file for file in os.listdir(directory) if os.path.splitext(file)[1].lower() == ".svg"),
+                       key=cls.natural_key)
+        output = None
+        kept = {}
+        used_ids = set()
+        saved = 0
+        unmerged = []   # parts copied without dedupe
+        try:
+            for i, file in enumerate(files):
+                Job.progress("merging parts", i, len(files))
+                file = os.path.join(directory, file)
+                if os.path.normcase(os.path.abspath(file)) == os.path.normcase(os.path.abspath(output_name)):
+                    continue
+                with open(file, "rb") as svg_file:
+                    if not os.fstat(svg_file.fileno()).st_size:
+                        continue
+                    with mmap.mmap(svg_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        start = cls.SVG_START.search(data)
+                        tag = start and SVGSplit.START_TAG.match(data, start.start())
+                        if not tag or tag.group(2):
+                            continue
+                        end = data.rfind(b"</svg>")
+                        if end < tag.end():
+                            continue
+                        Profile.count("parts merged")
+                        if output is None:
+                            os.makedirs(output_dir, exist_ok=True)
+                            output = open(output_name, "wb")
+                            output.write(data[:tag.end()])
+                        if dedupe:
+                            try:
+                                body, part_saved = cls.deduplicate(data, tag.end(), end, kept, used_ids)
+                            except xml.parsers.expat.ExpatError:
+                                unmerged.append(file)
+                            else:
+                                output.write(body)
+                                saved += part_saved
+                                continue
+                        with memoryview(data) as view:
+                            for block in range(tag.end(), end, cls.BLOCK_SIZE):
+                                output.write(view[block:min(block + cls.BLOCK_SIZE, end)])
+            if output is None:
+                return None, 0, unmerged
+            output.write(b"</svg>")
+        except JobCancelled:
+            if output is not None:
+                output.close()
+                os.remove(output_name)
+            raise
+        finally:
+            if output is not None:
+                output.close()
+        if dedupe:
+            Profile.count("definitions removed bytes", saved)
+        if Profile.current is not None:
+            Profile.count("bytes out", os.path.getsize(output_name))
+        return output_name, saved, unmerged
+
+
+class DirectoryIndex(object):
+    """names of directories listed once by scandir, lookups don't stat files.
+    case insensitive file systems are detected per directory"""
+
+    def __init__(self):
+        self.listings = {}  # directory: ({name: entry}, {folded name: entry} or None)
+        self.checked = {}   # (path, is file): result, every distinct name is looked up once
+
+    def listing(self, directory):
+        result = self.listings.get(directory)
+        if result is None:
+            entries = {}
+            try:
+                for entry in os.scandir(directory or "."):
+                    entries[entry.name] = entry
+            except OSError:
+                pass
+            folded = None
+            for name in entries:
+                swapped = name.swapcase()
+                if swapped != name and swapped not in entries:
+                    if os.path.exists(os.path.join(directory, swapped)):
+                        folded = {key.lower(): entry for key, entry in entries.items()}
+                    break
+            result = self.listings[directory] = entries, folded
+            Profile.count("directories listed")
+        return result
 
-class SVGParseImages(bpy.types.Operator):
-    bl_idname = "mesh.am1dsvg_svg_parse_images"
-    bl_label = "SVG parse images"
-    bl_options = {'REGISTER', 'UNDO'}
+    def entry(self, path):
+        """scandir entry of path, None if it's missing, False if path can't be looked up by name"""
+        directory, name = os.path.split(os.path.normpath(path))
+        if name in ("", os.curdir, os.pardir):
+            return False
+        entries, folded = self.listing(directory)
+        entry = entries.get(name)
+        if entry is None and folded is not None:
+            entry = folded.get(name.lower())
+        return entry
+
+    def exists(self, path):
+        result = self.checked.get((path, False))
+        if result is None:
+            entry = self.entry(path)
+            if entry is False or entry is not None and entry.is_symlink():
+                result = os.path.exists(path)
+            else:
+                result = entry is not None
+            self.checked[(path, False)] = result
+        return result
 
-    @staticmethod
-    def parse(context):
-        """get list of found and lost files"""
+    def isfile(self, path):
+        result = self.checked.get((path, True))
+        if result is None:
+            entry = self.entry(path)
+            if entry is False:
+                result = os.path.isfile(path)
+            else:
+                try:
+                    result = entry is not None and entry.is_file()
+                except OSError:
+                    result = False
+            self.checked[(path, True)] = result
+        return result
 
-        def checkTag(current_tag):
-            if current_tag.tag == "image":
 
-                svg_path = copy.copy(file_path)
+class ImageScanner(HTMLParser):
+    """tolerant scanner of malformed files, collects image links without building structure"""
 
-                path = current_tag.attrs["xlink:href"].replace("\\", "/")
-                if os.path.isabs(path):     # absolute path
-                    if context.scene.amsvg_settings.svg_crop_abs:  # search local
-                        svg_path.append(path.split("/")[-1])
-                        path = "/".join(svg_path)
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.found = []  # (line, link) since last take
 
-                    if os.path.isfile(path):
-                        abs_found_files.append(path)
-                    else:
-                        abs_lost_files.append(path)
+    def handle_starttag(self, tag, attrs):
+        if tag == "image":
+            for key, value in attrs:
+                if key == "xlink:href":
+                    self.found.append((self.getpos()[0], value))
+                    break
 
-                else:
-                    path = path.split("/")
-                    while svg_path and path and path[0] == "..":
-                        path.pop(0)
-                        svg_path.pop(-1)
-                    svg_path.extend(path)
-                    path = "/".join(svg_path)
 
-                    if os.path.exists(path):
-                        found_files.append(path)
-                    else:
-                        lost_files.append(path)
+class SVGParseImages(object):
+
+    @staticmethod
+    def scan(input_name):
+        """yield (line, link) of every image as parser meets it, no structure is built.
+        file is fed by chunks to expat, malformed file is scanned again by tolerant html parser
+        and links already given are skipped"""
+
+        def start_element(name, attrs):
+            if name == "image":
+                link = attrs.get("xlink:href")
+                if link is not None:
+                    found.append((p.CurrentLineNumber, link))
+
+        found = []
+        given = 0
+        p = xml.parsers.expat.ParserCreate()
+        p.StartElementHandler = start_element
+        try:
+            for chunk in read_chunks(input_name, StructureBuilder.CHUNK_SIZE, binary=True,
+                                     use_mmap=StructureBuilder.MMAP):
+                p.Parse(chunk)
+                for item in found:
+                    yield item
+                given += len(found)
+                del found[:]
+            p.Parse(b"", 1)
+            for item in found:
+                yield item
+            return
+        except xml.parsers.expat.ExpatError:
+            pass
+
+        scanner = ImageScanner()
+        found = scanner.found
+        for chunk in read_chunks(input_name, StructureBuilder.CHUNK_SIZE, use_mmap=StructureBuilder.MMAP):
+            scanner.feed(chunk)
+            for item in found[given:]:
+                yield item
+            given = max(given - len(found), 0)
+            del found[:]
+        scanner.close()
+        for item in found[given:]:
+            yield item
 
-            for child in current_tag.children:
-                checkTag(child)
+    @classmethod
+    def parse(cls, input_name, crop_abs=False, index=None):
+        """get list of found and lost files. index - DirectoryIndex shared between calls"""
 
+        index = index or DirectoryIndex()
         found_files = []
         lost_files = []
         abs_found_files = []
         abs_lost_files = []
-        file_path = os.path.dirname(context.scene.amsvg_settings.svg_input.replace("\\", "/")).split("/")
-        checkTag(StructureBuilder(context.scene.amsvg_settings.svg_input).root[0])
-        return found_files, lost_files, abs_found_files, abs_lost_files
+        file_path = os.path.dirname(input_name.replace("\\", "/")).split("/")
+        links = None
+        cache = StructureBuilder.CACHE
+        if cache is not None:
+            fingerprint = cache.fingerprint(input_name)
+            links = cache.get(input_name, "image links", fingerprint)
+            if links is None:
+                links = list(cls.scan(input_name))
+                cache.put(input_name, "image links", links, fingerprint)
+        for line, path in links if links is not None else cls.scan(input_name):
+            if path.startswith("data:"):    # embedded image
+                continue
+            svg_path = list(file_path)
 
-    def execute(self, context):
+            path = path.replace("\\", "/")
+            if os.path.isabs(path):     # absolute path
+                if crop_abs:  # search local
+                    svg_path.append(path.split("/")[-1])
+                    path = "/".join(svg_path)
 
-        if not os.path.exists(context.scene.amsvg_settings.svg_input):
-            return {"FINISHED"}
+                if index.isfile(path):
+                    abs_found_files.append(path)
+                else:
+                    abs_lost_files.append(path)
 
-        found_files, lost_files, abs_found_files, abs_lost_files = self.parse(context)
+            else:
+                path = path.split("/")
+                while svg_path and path and path[0] == "..":
+                    path.pop(0)
+                    svg_path.pop(-1)
+                svg_path.extend(path)
+                path = "/".join(svg_path)
+
+                if index.exists(path):
+                    found_files.append(path)
+                else:
+                    lost_files.append(path)
+        Profile.count("image links", len(found_files) + len(lost_files) + len(abs_found_files) + len(abs_lost_files))
+        return found_files, lost_files, abs_found_files, abs_lost_files
 
-        if "svg parse images" in bpy.data.texts:
-            text_block = bpy.data.texts["svg parse images"]
-        else:
-            text_block = bpy.data.texts.new(name="svg parse images")
-        text_block.clear()
-        found_files = list(set(found_files))
-        lost_files = list(set(lost_files))
+    @staticmethod
+    def report(found_files, lost_files, abs_found_files, abs_lost_files):
+        """text of "svg parse images" block"""
+
+        found_files = list(collections.OrderedDict.fromkeys(found_files))
+        lost_files = list(collections.OrderedDict.fromkeys(lost_files))
         for i, line in enumerate(found_files):
             found_files[i] = "%.2i) %s" % (i + 1, line)
         for i, line in enumerate(lost_files):
             lost_files[i] = "%.2i) %s" % (i + 1, line)
 
-        text_block.write("ABSOLUTE PATHS:\n")
+        text = ["ABSOLUTE PATHS:\n"]
         if abs_found_files:
-            text_block.write("FOUND FILES:\n" + "\n".join(abs_found_files) + "\n\n")
+            text.append("FOUND FILES:\n" + "\n".join(abs_found_files) + "\n\n")
         else:
-            text_block.write("NO FOUND FILES\n\n")
+            text.append("NO FOUND FILES\n\n")
         if abs_lost_files:
-            text_block.write("LOST FILES:\n" + "\n".join(abs_lost_files) + "\n\n")
+            text.append("LOST FILES:\n" + "\n".join(abs_lost_files) + "\n\n")
         else:
-            text_block.write("NO LOST FILES\n\n")
-        text_block.write("------\n")
+            text.append("NO LOST FILES\n\n")
+        text.append("------\n")
 
-        text_block.write("RELATIVE PATHS:\n")
+        text.append("RELATIVE PATHS:\n")
         if found_files:
-            text_block.write("FOUND FILES:\n" + "\n".join(found_files) + "\n\n")
+            text.append("FOUND FILES:\n" + "\n".join(found_files) + "\n\n")
         else:
-            text_block.write("NO FOUND FILES\n\n")
+            text.append("NO FOUND FILES\n\n")
         if lost_files:
-            text_block.write("LOST FILES:\n" + "\n".join(lost_files))
+            text.append("LOST FILES:\n" + "\n".join(lost_files))
         else:
-            text_block.write("NO LOST FILES")
-        return {"FINISHED"}
+            text.append("NO LOST FILES")
+        return "".join(text)
 
 
-class SVGCopyImages(bpy.types.Operator):
+class SVGCopyImages(object):
+    """copy is made by shutil.copy2, which uses kernel copy where system has it, and keeps mtime,
+    so next run skips files of same size and mtime. with checksum files differing by mtime only are hashed"""
 
-    bl_idname = "mesh.am1dsvg_svg_copy_images"
-    bl_label = "SVG copy images"
-    bl_options = {'REGISTER', 'UNDO'}
+    HASH_BLOCK = 1024 * 1024
 
-    def execute(self, context):
+    @staticmethod
+    def targets(sources, output_dir):
+        """{source: target} for distinct sources. sources sharing name get name_1, name_2 in order of sorted
+        source paths, sources already in output directory keep their names.
+        names are compared ignoring case to be safe on any file system"""
+
+        directory = os.path.abspath(output_dir)
+        result = {source: source for source in sources if os.path.dirname(os.path.abspath(source)) == directory}
+        taken = set(os.path.basename(source).lower() for source in result)
+        for source in sorted(sources):
+            if source in result:
+                continue
+            name, extension = os.path.splitext(os.path.basename(source))
+            target = name + extension
+            number = 0
+            while target.lower() in taken:
+                number += 1
+                target = "%s_%i%s" % (name, number, extension)
+            taken.add(target.lower())
+            result[source] = os.path.join(output_dir, target)
+        return result
 
-        if not os.path.exists(context.scene.amsvg_settings.svg_input):
-            return {"FINISHED"}
+    @classmethod
+    def file_hash(cls, file_name):
+        file_hash = hashlib.sha1()
+        with open(file_name, "rb") as file:
+            for block in iter(lambda: file.read(cls.HASH_BLOCK), b""):
+                file_hash.update(block)
+        return file_hash.digest()
 
-        found_files = SVGParseImages.parse(context)[0]
-        os.makedirs(context.scene.amsvg_settings.svg_output, exist_ok=True)
-        for abs_file in found_files:
-            with open(abs_file, "rb") as file:
-                data = file.read()
-            with open(os.path.join(context.scene.amsvg_settings.svg_output, os.path.split(abs_file)[1]), "wb") as file:
-                file.write(data)
+    @classmethod
+    def copy(cls, source, target, checksum=False):
+        """copy source unless target has the same content. True if copied"""
+
+        try:
+            target_stat = os.stat(target)
+        except OSError:
+            target_stat = None
+        if target_stat is not None:
+            source_stat = os.stat(source)
+            if os.path.samestat(source_stat, target_stat):
+                return False
+            if source_stat.st_size == target_stat.st_size:
+                if int(source_stat.st_mtime) == int(target_stat.st_mtime):
+                    return False
+                if checksum and cls.file_hash(source) == cls.file_hash(target):
+                    return False
+        shutil.copy2(source, target)
+        return True
 
-        return {"FINISHED"}
+    @classmethod
+    def main(cls, input_name, output_dir=None, crop_abs=False, index=None, workers=1, checksum=False):
+        """copy found images into output directory. empty output means input directory.
+        returns [(source, target, copied)] in order of first link"""
+
+        index = index or DirectoryIndex()
+        found_files = collections.OrderedDict.fromkeys(
+            os.path.normpath(path) for path in SVGParseImages.parse(input_name, crop_abs, index)[0])
+        found_files = [path for path in found_files if index.isfile(path)]  # links may point to directories
+        output_dir = output_dir or os.path.dirname(input_name)
+        os.makedirs(output_dir or ".", exist_ok=True)
+        targets = cls.targets(found_files, output_dir)
+
+        workers = workers or os.cpu_count() or 1
+        with Profile.phase("copy"):
+            if workers == 1 or len(found_files) < 2:
+                copied = []
+                for source in found_files:
+                    Job.progress("copying images", len(copied), len(found_files))
+                    copied.append(cls.copy(source, targets[source], checksum))
+            else:
+                with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+                    futures = [executor.submit(cls.copy, source, targets[source], checksum) for source in found_files]
+                    try:
+                        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                            Job.progress("copying images", i + 1, len(found_files))
+                    except JobCancelled:
+                        Job.cancel_futures(futures)
+                        raise
+                    copied = [future.result() for future in futures]
+        if Profile.current is not None:
+            Profile.count("images copied", sum(copied))
+            Profile.count("bytes out", sum(os.path.getsize(targets[source])
+                                           for source, done in zip(found_files, copied) if done))
+        return [(source, targets[source], done) for source, done in zip(found_files, copied)]
+
+
+class EmbeddedImages(object):
+    """extract moves data:image;base64 links into content addressed files "sha1 prefix.extension" and links them
+    relatively, inline does the reverse for archiving. file is streamed by chunks, base64 is decoded and encoded
+    by pieces, so neither svg nor image has to fit in memory. output is written next to target and replaces it
+    only when pass is finished. inline writes base64 in one line, so line breaks of original base64 aren't restored"""
+
+    MIME_TYPES = collections.OrderedDict((("png", "image/png"), ("jpg", "image/jpeg"), ("jpeg", "image/jpeg"),
+                                          ("gif", "image/gif"), ("svg", "image/svg+xml"), ("webp", "image/webp"),
+                                          ("bmp", "image/bmp")))
+    EXTENSIONS = {"jpeg": "jpg", "svg+xml": "svg"}    # file extensions of mime subtypes named otherwise
+    DATA_LINK = re.compile(br"""(\bhref\s*=\s*(["']))data:image/([\w.+-]+);base64,""")
+    # href of image element, other elements like <a href="icon.png"> are left alone
+    FILE_LINK = re.compile(br"""(<(?:[\w.-]+:)?image\s[^>]*?\bhref\s*=\s*(["']))(?!data:|#)([^"'<>]{1,2048})\2""")
+    MARGIN = 4096   # bytes kept to next chunk, longer than any link match starting there
+    NOT_BASE64 = re.compile(br"&#(?:x[0-9a-fA-F]+|\d+);|[^A-Za-z0-9+/=&]")  # whitespace and its entities
+    ENCODE_BLOCK = 3 * 256 * 1024
 
+    @staticmethod
+    def output_name(input_name, output_dir=None):
+        if not output_dir:
+            return input_name
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, os.path.basename(input_name))
 
-class SVGIconSlicer(bpy.types.Operator):
+    @classmethod
+    def decode(cls, data, final=False):
+        """decode whole base64 groups of data. returns bytes and not decoded rest"""
+
+        rest = b""
+        amp = data.rfind(b"&", -12)  # entity cut by chunk end
+        if amp >= 0 and data.find(b";", amp) < 0 and not final:
+            data, rest = data[:amp], data[amp:]
+        data = cls.NOT_BASE64.sub(b"", data)
+        if b"&" in data:
+            raise ValueError("unexpected & in base64 image")
+        size = len(data) - len(data) % 4
+        if final and size != len(data):
+            raise ValueError("base64 image is truncated")
+        return binascii.a2b_base64(data[:size]), data[size:] + rest
 
-    bl_idname = "mesh.am1dsvg_svg_icon_slicer"
-    bl_label = "SVG icon slicer"
-    bl_options = {'REGISTER', 'UNDO'}
+    @classmethod
+    def extract(cls, input_name, output_dir=None, images_dir=None):
+        """returns output file name, count of extracted links, list of image files.
+        images_dir defaults to "output file_images" """
+
+        output_name = cls.output_name(input_name, output_dir)
+        images_dir = images_dir or os.path.splitext(output_name)[0] + "_images"
+        relative_dir = os.path.relpath(images_dir, os.path.dirname(os.path.abspath(output_name)))
+        links = 0
+        images = collections.OrderedDict()
+        image = None    # [file, hash, quote, extension, not decoded rest] of link being decoded
+        temp_name = output_name + ".part"
+        try:
+            with open(temp_name, "wb") as output:
+                buffer = b""
+                chunks = read_chunks(input_name, StructureBuilder.CHUNK_SIZE, binary=True,
+                                     use_mmap=StructureBuilder.MMAP)
+                for chunk in itertools.chain(chunks, [b""]):
+                    final = not chunk
+                    buffer += chunk
+                    position = 0
+                    while True:
+                        if image is None:
+                            safe = len(buffer) if final else len(buffer) - cls.MARGIN
+                            match = cls.DATA_LINK.search(buffer, position)
+                            if match is None or match.start() >= safe:
+                                safe = max(safe, position)
+                                output.write(buffer[position:safe])
+                                position = safe
+                                break
+                            output.write(buffer[position:match.end(1)])
+                            position = match.end()
+                            subtype = match.group(3).decode("ascii").lower()
+                            extension = cls.EXTENSIONS.get(subtype, subtype.split("+")[0])
+                            os.makedirs(images_dir, exist_ok=True)
+                            image = [open(os.path.join(images_dir, ".%i.part" % links), "wb"), hashlib.sha1(),
+                                     match.group(2), extension, b""]
+                        else:
+                            end = buffer.find(image[2], position)
+                            data, image[4] = cls.decode(image[4] + buffer[position:len(buffer) if end < 0 else end],
+                                                        end >= 0)
+                            image[0].write(data)
+                            image[1].update(data)
+                            if end < 0:
+                                position = len(buffer)
+                                break
+                            image[0].close()
+                            name = "%s.%s" % (image[1].hexdigest()[:16], image[3])
+                            image_name = os.path.join(images_dir, name)
+                            if os.path.exists(image_name):
+                                os.remove(image[0].name)
+                            else:
+                                os.replace(image[0].name, image_name)
+                            images[image_name] = None
+                            link = os.path.join(relative_dir, name).replace("\\", "/")
+                            output.write(escape(link, {'"': "&quot;", "'": "&apos;"}).encode("utf-8"))
+                            links += 1
+                            position = end
+                            image = None
+                    buffer = buffer[position:]
+                if image is not None:
+                    raise ValueError("base64 image isn't closed")
+            os.replace(temp_name, output_name)
+            if Profile.current is not None:
+                Profile.count("images extracted", links)
+                Profile.count("bytes out", os.path.getsize(output_name))
+        finally:
+            if image is not None:
+                image[0].close()
+                if os.path.exists(image[0].name):
+                    os.remove(image[0].name)
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+        return output_name, links, list(images)
 
-    def execute(self, context):
-        if context.scene.amsvg_settings.svg_label:
-            SVGTransformChecker.execute(context.scene.amsvg_settings.svg_input, context.scene.amsvg_settings.svg_output)
-        else:
-            SVGIconSplitter.execute(context.scene.amsvg_settings.svg_input, context.scene.amsvg_settings.svg_output)
-        return {"FINISHED"}
+    @classmethod
+    def inline(cls, input_name, output_dir=None):
+        """links to existing image files are replaced by base64 data. returns output file name, count of links"""
+
+        output_name = cls.output_name(input_name, output_dir)
+        input_dir = os.path.dirname(input_name)
+        links = 0
+        temp_name = output_name + ".part"
+        try:
+            with open(temp_name, "wb") as output:
+                buffer = b""
+                chunks = read_chunks(input_name, StructureBuilder.CHUNK_SIZE, binary=True,
+                                     use_mmap=StructureBuilder.MMAP)
+                for chunk in itertools.chain(chunks, [b""]):
+                    buffer += chunk
+                    safe = len(buffer) if not chunk else len(buffer) - cls.MARGIN
+                    tag_start = buffer.rfind(b"<", 0, safe)
+                    if chunk and tag_start >= 0 and buffer.find(b">", tag_start) < 0:
+                        safe = tag_start    # tag isn't read whole yet, its link may follow
+                    position = 0
+                    for match in cls.FILE_LINK.finditer(buffer):
+                        if match.start() >= safe:
+                            break
+                        link = unescape(match.group(3).decode("utf-8")).replace("\\", "/")
+                        mime_type = cls.MIME_TYPES.get(os.path.splitext(link)[1][1:].lower())
+                        image_name = os.path.join(input_dir, link)
+                        if mime_type is None or "://" in link or not os.path.isfile(image_name):
+                            continue
+                        output.write(buffer[position:match.end(1)])
+                        output.write(("data:%s;base64," % mime_type).encode("ascii"))
+                        with open(image_name, "rb") as image:
+                            for block in iter(lambda: image.read(cls.ENCODE_BLOCK), b""):
+                                output.write(binascii.b2a_base64(block)[:-1])
+                        position = match.end() - 1
+                        links += 1
+                    safe = max(safe, position)
+                    output.write(buffer[position:safe])
+                    buffer = buffer[safe:]
+            os.replace(temp_name, output_name)
+            if Profile.current is not None:
+                Profile.count("images embedded", links)
+                Profile.count("bytes out", os.path.getsize(output_name))
+        finally:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+        return output_name, links
 
 
 class SVGTransformChecker(object):
@@ -967,42 +2391,529 @@ class SVGTransformChecker(object):
             return {"CANCELED"}
         matrix_tag = TagUnit("g", {"id": "TranMatrix", "inkscape:label": "TranMatrix", "inkscape:groupmode": "layer"})
         tree[0].children.append(matrix_tag)
-        cls.sort(tree[0], matrix_tag)
-        open(output_name, "w", encoding="utf-8").write(tree[0].string())
+        with Profile.phase("sort"):
+            cls.sort(tree[0], matrix_tag)
+        with Profile.phase("write"), open(output_name, "w", encoding="utf-8") as output_file:
+            tree[0].write(output_file)
+        Profile.count("transformed moved", len(matrix_tag.children))
         return {"FINISHED"}
 
     @classmethod
     def sort(cls, current_tag, matrix_tag):
         list_pass = []  # will be checked
         list_dont = []  # won't be checked and go to matrix
-        for tag in current_tag.children:
-            if "transform" in tag.attrs:
+        for tag in current_tag._children:
+            if tag.get_attr("transform") is not None:
                 list_dont.append(tag)
             else:
                 list_pass.append(tag)
 
         current_tag.children = list_pass
         matrix_tag.children.extend(list_dont)
-        for next_tag in current_tag.children:
+        for next_tag in list_pass:
             cls.sort(next_tag, matrix_tag)
 
 
+NUMBER = re.compile(r"\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)")
+
+
+def parse_number(text):
+    """leading number of attribute value, units are ignored"""
+    match = NUMBER.match(text)
+    if match is None:
+        raise ValueError("%r isn't number" % text)
+    return float(match.group(1))
+
+
+def format_number(value, precision):
+    """number rounded to precision decimals without trailing zeros"""
+    text = "%.*f" % (precision, value)
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+class PathData(object):
+    """tokenizer and formatter of path d attribute. numbers are kept as text, so only moved ones are formatted"""
+
+    ARGUMENTS = {"M": 2, "L": 2, "T": 2, "H": 1, "V": 1, "C": 6, "S": 4, "Q": 4, "A": 7, "Z": 0}
+    SEGMENT = re.compile(r"([MmZzLlHhVvCcSsQqTtAa])([^MmZzLlHhVvCcSsQqTtAa]*)")
+    NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+    # axis of absolute coordinate by argument index, None isn't coordinate
+    AXES = {"M": (0, 1), "L": (0, 1), "T": (0, 1), "H": (0,), "V": (1,), "C": (0, 1) * 3, "S": (0, 1) * 2,
+            "Q": (0, 1) * 2, "A": (None, None, None, None, None, 0, 1), "Z": ()}
+
+    @classmethod
+    def parse(cls, d):
+        """[(command, number count), ...] and flat list of number texts"""
+
+        commands = []
+        tokens = []
+        find_numbers = cls.NUMBER.findall
+        for command, arguments in cls.SEGMENT.findall(d):
+            numbers = find_numbers(arguments)
+            count = cls.ARGUMENTS[command.upper()]
+            if count == 7:
+                numbers = cls.arc_flags(numbers)
+            if numbers and not count or count and len(numbers) % count:
+                raise ValueError("path command %s has %i numbers" % (command, len(numbers)))
+            commands.append((command, len(numbers)))
+            tokens.extend(numbers)
+        return commands, tokens
+
+    @staticmethod
+    def arc_flags(numbers):
+        """split flags written without separator, like 0 011 10,10"""
+        result = []
+        numbers.reverse()
+        while numbers:
+            number = numbers.pop()
+            if len(result) % 7 in (3, 4) and len(number) > 1:
+                numbers.append(number[1:])
+                number = number[0]
+            result.append(number)
+        return result
+
+    @classmethod
+    def absolute(cls, commands):
+        """(number index, axis) of absolute coordinates. first point of path is absolute even for m"""
+
+        positions = []
+        start = 0
+        for i, (command, count) in enumerate(commands):
+            if command.isupper():
+                axes = cls.AXES[command]
+                for j in range(count):
+                    axis = axes[j % len(axes)]
+                    if axis is not None:
+                        positions.append((start + j, axis))
+            elif i == 0 and command == "m":
+                positions.extend(((start, 0), (start + 1, 1)))
+            start += count
+        return positions
+
+    @classmethod
+    def bounds(cls, commands, tokens):
+        """xmin, ymin, xmax, ymax of end and control points, arcs are bounded by end points.
+        numbers of absolute commands must be floats already, like absolute() positions after parsing"""
+
+        xs = []
+        ys = []
+        x = y = start_x = start_y = 0.0
+        start = 0
+        for command, count in commands:
+            numbers = tokens[start:start + count]
+            start += count
+            if command in "Zz":
+                x, y = start_x, start_y
+            elif not count:
+                continue
+            elif command in "MLTCSQ":
+                xs.extend(numbers[0::2])
+                ys.extend(numbers[1::2])
+                x, y = numbers[-2], numbers[-1]
+                if command == "M":
+                    start_x, start_y = numbers[0], numbers[1]
+            elif command == "H":
+                xs.extend(numbers)
+                ys.append(y)
+                x = numbers[-1]
+            elif command == "V":
+                ys.extend(numbers)
+                xs.append(x)
+                y = numbers[-1]
+            elif command == "A":
+                xs.extend(numbers[5::7])
+                ys.extend(numbers[6::7])
+                x, y = numbers[-2], numbers[-1]
+            else:  # relative command, every segment starts from previous end point
+                step = cls.ARGUMENTS[command.upper()]
+                for i in range(0, count, step):
+                    if command == "h":
+                        x += float(numbers[i])
+                    elif command == "v":
+                        y += float(numbers[i])
+                    else:
+                        dx, dy = x, y
+                        for j in range(i + 5 if command == "a" else i, i + step, 2):
+                            x, y = float(numbers[j]) + dx, float(numbers[j + 1]) + dy
+                            xs.append(x)
+                            ys.append(y)
+                        if command == "m" and i == 0:
+                            start_x, start_y = x, y
+                        continue
+                    xs.append(x)
+                    ys.append(y)
+        if not xs:
+            return x, y, x, y
+        return min(xs), min(ys), max(xs), max(ys)
+
+    @staticmethod
+    def format(commands, tokens):
+        """d attribute text, coordinate pairs are joined by comma"""
+
+        result = []
+        start = 0
+        for command, count in commands:
+            result.append(command)
+            values = tokens[start:start + count]
+            start += count
+            if command in "HVhv":
+                result.extend(values)
+            elif command in "Aa":
+                for i in range(0, count, 7):
+                    result.append("%s,%s %s %s %s %s,%s" % tuple(values[i:i + 7]))
+            else:
+                result.extend([values[i] + "," + values[i + 1] for i in range(0, count, 2)])
+        return " ".join(result)
+
+
+class IconGrid(object):
+    """spatial index of sheet cells. shapes are kept by bounding box, labels by integer cell.
+    straddle - cell of shape crossing cell border: anchor - cell of its first point, center - cell of box center,
+    drop - shape is left out"""
+
+    STRADDLE = ("anchor", "center", "drop")
+
+    def __init__(self, size, straddle="anchor"):
+        if straddle not in self.STRADDLE:
+            raise ValueError("unknown straddle policy %r" % straddle)
+        self.size = size
+        self.straddle = straddle
+        self.shapes = []  # shapes in document order
+        self.cells = collections.defaultdict(list)  # (column, row) - indices of shapes
+        self.labels = {}  # (column, row) - icon file name
+        self.straddling = 0  # shapes crossing cell border
+
+    def cell(self, x, y):
+        return int(x // self.size), int(y // self.size)
+
+    def add_label(self, x, y, file_name):
+        """image on right of icon names cell, 1 px tolerance of image position"""
+        self.labels[(int((x + 1) // self.size) - 1, int((y + 1) // self.size))] = file_name
+
+    def add_shape(self, shape, anchor, bounds):
+        """put shape into cell by its bounds, returns cell or None for dropped shape"""
+
+        size = self.size
+        xmin, ymin, xmax, ymax = bounds
+        first = self.cell(xmin, ymin)
+        last = int(-(-xmax // size)) - 1, int(-(-ymax // size)) - 1  # right and bottom borders aren't inside
+        if last[0] <= first[0] and last[1] <= first[1]:
+            cell = first
+        else:
+            self.straddling += 1
+            if self.straddle == "drop":
+                return None
+            elif self.straddle == "center":
+                cell = self.cell((xmin + xmax) / 2, (ymin + ymax) / 2)
+            else:
+                cell = self.cell(*anchor)
+        self.cells[cell].append(len(self.shapes))
+        self.shapes.append((shape, cell))
+        return cell
+
+    def query(self, region=None):
+        """labeled cells with shapes inside (first column, first row, last column, last row) region, all by default.
+        region is walked cell by cell only while it's smaller than label table"""
+
+        if region is None:
+            cells = self.labels
+        else:
+            first_column, first_row, last_column, last_row = region
+            if (last_column - first_column + 1) * (last_row - first_row + 1) < len(self.labels):
+                cells = [(column, row) for row in range(first_row, last_row + 1)
+                         for column in range(first_column, last_column + 1)]
+            else:
+                cells = [cell for cell in self.labels if first_column <= cell[0] <= last_column and
+                         first_row <= cell[1] <= last_row]
+        return [cell for cell in cells if cell in self.labels and cell in self.cells]
+
+
+def write_if_changed(file_name, text):
+    """write text or bytes file only if its content differs, so mtime of untouched file is kept. True if written"""
+
+    binary = isinstance(text, bytes)
+    try:
+        with open(file_name, "rb") if binary else open(file_name, encoding="utf-8") as file:
+            if file.read() == text:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(file_name, "wb") if binary else open(file_name, "w", encoding="utf-8") as file:
+        file.write(text)
+    return True
+
+
+class RCCWriter(object):
+    """Qt binary resource (.rcc, format version 1 or 2) built from data in memory, so rcc tool isn't needed.
+    files are compressed like qCompress by workers threads, data is kept raw unless compression saves THRESHOLD %"""
+
+    COMPRESSED = 1
+    DIRECTORY = 2
+    THRESHOLD = 70  # rcc -threshold default
+
+    def __init__(self, version=1, level=-1, workers=1):
+        if version not in (1, 2):
+            raise ValueError("unsupported rcc version %r" % version)
+        self.version = version
+        self.level = level  # zlib level, 0 - no compression
+        self.workers = workers
+        self.root = {}  # name - bytes of file or dict of directory
+
+    def add(self, path, data):
+        """add file by resource path like /icons/theme/index.theme"""
+        names = [name for name in path.split("/") if name]
+        directory = self.root
+        for name in names[:-1]:
+            directory = directory.setdefault(name, {})
+            if not isinstance(directory, dict):
+                raise ValueError("%s is file, not directory of %s" % (name, path))
+        directory[names[-1]] = data
+
+    @staticmethod
+    def qt_hash(name):
+        """qt_hash of QString, over utf-16 code units"""
+        encoded = name.encode("utf-16-be")
+        value = 0
+        for unit in struct.unpack(">%iH" % (len(encoded) // 2), encoded):
+            value = (value << 4) + unit
+            value ^= (value & 0xf0000000) >> 23
+            value &= 0x0fffffff
+        return value
+
+    def compress(self, data):
+        """qCompress data and compressed flag, or raw data if compression doesn't pay off"""
+        if not self.level or not data:
+            return data, 0
+        compressed = struct.pack(">I", len(data)) + zlib.compress(data, self.level)
+        if int(100.0 * (len(data) - len(compressed)) / len(data)) >= self.THRESHOLD:
+            return compressed, self.COMPRESSED
+        return data, 0
+
+    def build(self):
+        """bytes of rcc file: header, data blobs, names, tree.
+        tree nodes are laid out like rcc does: children sorted by hash, directories expanded from stack"""
+
+        nodes = [("", self.root)]
+        first_child = {}  # id of directory - index of its first child node
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            first_child[id(directory)] = len(nodes)
+            for name, node in sorted(directory.items(), key=lambda item: self.qt_hash(item[0])):
+                nodes.append((name, node))
+                if isinstance(node, dict):
+                    stack.append(node)
+
+        files = [node for name, node in nodes if not isinstance(node, dict)]
+        if self.workers != 1 and len(files) > 1:  # zlib releases gil
+            with concurrent.futures.ThreadPoolExecutor(self.workers or os.cpu_count() or 1) as executor:
+                blobs = list(executor.map(self.compress, files))
+        else:
+            blobs = [self.compress(data) for data in files]
+
+        data = bytearray()
+        names = bytearray()
+        name_offsets = {}
+        tree = bytearray()
+        blobs = iter(blobs)
+        for i, (name, node) in enumerate(nodes):
+            if i == 0:
+                name_offset = 0  # root has no name
+            elif name in name_offsets:
+                name_offset = name_offsets[name]
+            else:
+                name_offset = name_offsets[name] = len(names)
+                encoded = name.encode("utf-16-be")
+                names += struct.pack(">HI", len(encoded) // 2, self.qt_hash(name)) + encoded
+
+            if isinstance(node, dict):
+                tree += struct.pack(">IHII", name_offset, self.DIRECTORY, len(node), first_child[id(node)])
+            else:
+                blob, flags = next(blobs)
+                tree += struct.pack(">IHHHI", name_offset, flags, 0, 1, len(data))  # any country, C language
+                data += struct.pack(">I", len(blob)) + blob
+            if self.version >= 2:
+                tree += struct.pack(">Q", 0)  # last modified isn't stored, output depends only on content
+
+        header_size = 20
+        return b"".join((b"qres", struct.pack(">IIII", self.version, header_size + len(data) + len(names),
+                                              header_size, header_size + len(data)), data, names, tree))
+
+
+class IconManifest(object):
+    """content hashes of sliced icons kept in json next to them. icon is rewritten only if its hash changes"""
+
+    VERSION = 1
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.icons = {}  # icon name relative to output directory - hash
+        try:
+            with open(file_name, encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") == self.VERSION:
+                self.icons = data["icons"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+    def update(self, hashes, partial=False):
+        """replace hashes by {name: hash} of this run, returns added, changed, removed names.
+        partial run (region) keeps other icons and removes nothing"""
+
+        added = sorted(name for name in hashes if name not in self.icons)
+        changed = sorted(name for name, digest in hashes.items() if self.icons.get(name, digest) != digest)
+        if partial:
+            removed = []
+            self.icons.update(hashes)
+        else:
+            removed = sorted(name for name in self.icons if name not in hashes)
+            self.icons = dict(hashes)
+        return added, changed, removed
+
+    def save(self):
+        write_if_changed(self.file_name, json.dumps({"version": self.VERSION, "icons": self.icons}, indent=1,
+                                                    sort_keys=True))
+
+
+class IconVariant(object):
+    """color and size variant of sliced theme. colors - {color: new color}, like #1a1a1a or names,
+    size - width and height of icon, coordinates are kept by viewBox. variant without name is the base theme"""
+
+    SIZE = 64  # icon size of index.theme when variant keeps sheet size
+    COLOR_ATTRIBUTE = re.compile(r"""(\s(fill|stroke|stop-color|style)\s*=\s*(["']))(.*?)\3""", re.DOTALL)
+    STYLE_COLOR = re.compile(r"((?:^|;)\s*(?:fill|stroke|stop-color)\s*:)([^;]*)")
+
+    def __init__(self, name="", colors=None, size=None):
+        self.name = name
+        self.colors = dict((color.lower(), new) for color, new in (colors or {}).items())
+        self.size = size
+        self.pattern = None
+        if self.colors:
+            keys = sorted(self.colors, key=len, reverse=True)
+            self.pattern = re.compile(r"(?<![\w#-])(?:%s)(?![\w-])" % "|".join(re.escape(key) for key in keys),
+                                      re.IGNORECASE)
+
+    @classmethod
+    def load(cls, file_name):
+        """variants of json spec {"name": {"colors": {"#1a1a1a": "#eeeeee"}, "size": 32}, ...}.
+        entry with empty name changes the base theme"""
+
+        with open(file_name, encoding="utf-8") as file:
+            spec = json.load(file, object_pairs_hook=collections.OrderedDict)
+        if not isinstance(spec, dict):
+            raise ValueError("%s isn't json object of variants" % file_name)
+        variants = []
+        for name, options in spec.items():
+            if "/" in name or "\\" in name or name in (".", "..") or not isinstance(options, dict):
+                raise ValueError("bad variant %r in %s" % (name, file_name))
+            colors = options.get("colors") or {}
+            if not isinstance(colors, dict) or not all(isinstance(new, str) for new in colors.values()):
+                raise ValueError("colors of variant %r in %s aren't {color: new color} object" % (name, file_name))
+            size = options.get("size")
+            if size is not None and (isinstance(size, bool) or not isinstance(size, (int, float)) or size <= 0):
+                raise ValueError("size of variant %r in %s isn't positive number" % (name, file_name))
+            variants.append(cls(name, colors, size))
+        return variants
+
+    def index_theme(self, theme):
+        """index.theme text of theme, its size is the variant one"""
+        size = int(round(self.size)) if self.size else self.SIZE
+        return index_theme % (theme, size, max(size, 256))
+
+    def recolor(self, text):
+        """colors are replaced in fill, stroke and stop-color attributes and in their declarations of style,
+        so ids and labels named like colors are kept"""
+
+        if self.pattern is None:
+            return text
+
+        def replace(value):
+            return self.pattern.sub(lambda match: self.colors[match.group().lower()], value)
+
+        def attribute(match):
+            if match.group(2) == "style":
+                value = self.STYLE_COLOR.sub(lambda declaration: declaration.group(1) + replace(declaration.group(2)),
+                                             match.group(4))
+            else:
+                value = replace(match.group(4))
+            return match.group(1) + value + match.group(3)
+
+        return self.COLOR_ATTRIBUTE.sub(attribute, text)
+
+    def template(self, root, icon_tag):
+        """(prefix, suffix, offset) of root with icon_tag slot, resized and recolored"""
+
+        attrs = root.attrs
+        saved = dict((name, attrs[name]) for name in ("width", "height", "viewBox") if name in attrs)
+        if self.size:
+            if "viewBox" not in attrs:
+                attrs["viewBox"] = "0 0 %s %s" % (attrs.get("width", "0"), attrs.get("height", "0"))
+            attrs["width"] = attrs["height"] = format_number(self.size, 3)
+        try:
+            prefix, suffix, offset = root.template(icon_tag)
+        finally:  # values are put back in place, so attribute order of root stays the same
+            for name in ("width", "height", "viewBox"):
+                if name in saved:
+                    attrs[name] = saved[name]
+                else:
+                    attrs.pop(name, None)
+        return self.recolor(prefix), self.recolor(suffix), offset
+
+
+_icon_template = None  # (offset, templates, keep, icons) shared by icon writing processes
+
+
+def _init_icon_template(*template):
+    global _icon_template
+    _icon_template = template
+
+
+def _write_icon_range(first, last):
+    offset, templates, keep, icons = _icon_template
+    return [SVGIconSplitter.write_icon(tags, offset, templates, targets, keep) for tags, targets in icons[first:last]]
+
+
+def _write_icon_list(offset, templates, keep, icons):
+    """icons with their template sent to process by every task, python before 3.7 has no pool initializer"""
+    return [SVGIconSplitter.write_icon(tags, offset, templates, targets, keep) for tags, targets in icons]
+
+
 class SVGIconSplitter(object):
-    """it doesn't support transformation matrices"""
+    """it doesn't support transformation matrices.
+    icons are written by workers threads or processes of pool, qrc list keeps image order anyway.
+    manifest of icon hashes is kept in output directory, unchanged icons aren't rewritten.
+    binary rcc of theme is built from icons in memory.
+    color and size variants are made from the same parsed sheet, icon layer is serialized once for all of them"""
+
+    PRECISION = 6  # decimals of moved coordinates
 
     @classmethod
-    def execute(cls, input_name, output_name):
+    def execute(cls, input_name, output_name, workers=1, pool="thread", region=None, straddle="anchor",
+                force=False, prune=False, rcc=False, rcc_level=-1, variants=None):
+        """region - (first column, first row, last column, last row) of cells to slice, whole sheet by default.
+        force - rewrite unchanged icons, prune - delete icons removed from sheet.
+        rcc - write binary resource next to qrc, compressed by zlib level rcc_level. it needs whole sheet.
+        variants - IconVariant list, every named variant is written into its own subdirectory of output,
+        base theme is written too, changed by variant without name if there is one.
+        returns ([(theme, added, changed, removed, written icon count)], shapes crossing cell border),
+        None when sheet hasn't single svg root"""
+
         if not output_name:
             output_name = os.path.splitext(input_name)[0] + "_out"
         os.makedirs(output_name, exist_ok=True)
-        tag_dict = collections.defaultdict(list)
-        image_dict = {}
         structure_builder = StructureBuilder(input_name)
         tree = structure_builder.root
         if len(tree) != 1:
-            return {"CANCELED"}
-        size = int(tree[0].attrs["width"])
-        cls.createSortedList(size, tree[0], tag_dict, image_dict)
+            return None
+        grid = IconGrid(int(tree[0].attrs["width"]), straddle)
+        with Profile.phase("sort"):
+            cls.createSortedList(tree[0], grid)
+        cells = grid.query(region)
+        with Profile.phase("move"):
+            tag_dict = cls.move(grid, cells)
         tree[0].children = [tag for tag in tree[0].children if tag.tag != "g"]  # remove all groups tag
         icon_tag = TagUnit("g", {"id": "icon", "inkscape:label": "icon", "inkscape:groupmode": "layer"})
         tree[0].children.append(icon_tag)
@@ -1010,164 +2921,708 @@ class SVGIconSplitter(object):
         file_name = os.path.splitext(os.path.split(input_name)[1])[0]
         prefix = ""
 
-        for key, name in image_dict.items():
-            if key not in tag_dict:
-                continue
-            name = os.path.dirname(name)
+        for cell in cells:
+            name = os.path.dirname(grid.labels[cell])
             if not prefix or len(prefix) > len(name):
                 prefix = name
 
-        print(prefix)
-        if prefix:
-            os.makedirs(os.path.join(output_name, prefix), exist_ok=True)
-            index_file = open(os.path.join(output_name, prefix, "index.theme"), "w", encoding="utf-8")
-            qrc_file = open(os.path.join(output_name, prefix, file_name + ".qrc"), "w", encoding="utf-8")
-            prefix += "/"
-        else:
-            index_file = open(os.path.join(output_name, "index.theme"), "w", encoding="utf-8")
-            qrc_file = open(os.path.join(output_name, file_name + ".qrc"), "w", encoding="utf-8")
+        names = [grid.labels[cell] for cell in cells]
+        resources = [name.replace(prefix + "/", "", 1) if prefix else name for name in names]  # qrc file names
+        rcc = rcc and region is None
+        variants = list(variants or ())
+        if not any(not variant.name for variant in variants):
+            variants.insert(0, IconVariant())
+
+        themes = []  # directory, theme name, qrc name, manifest per variant
+        templates = []
+        for variant in variants:
+            directory = os.path.join(output_name, variant.name) if variant.name else output_name
+            theme = "%s_%s" % (file_name, variant.name) if variant.name else file_name
+            os.makedirs(os.path.join(directory, prefix), exist_ok=True)
+            qrc_name = os.path.join(directory, prefix, theme + ".qrc")
+            write_if_changed(os.path.join(directory, prefix, "index.theme"), variant.index_theme(theme))
+            if region is None or not os.path.exists(qrc_name):  # qrc of whole sheet isn't cut down to region
+                write_if_changed(qrc_name, "".join([file_name_qrc_prefix % (theme, theme)] +
+                                                   ["        <file>%s</file>\n" % resource for resource in resources] +
+                                                   [file_name_qrc_suffix]))
+            manifest = IconManifest(os.path.join(directory, theme + ".manifest.json"))
+            themes.append((directory, theme, qrc_name, manifest))
+
+            # grids, metadata and license are the same for every icon, only icon layer children change
+            with Profile.phase("templates"):
+                head, tail, offset = variant.template(tree[0], icon_tag)
+            templates.append((head, tail, hashlib.sha1((head + tail).encode("utf-8")).digest(), variant))
+
+        icons = [(tag_dict[cell], [(os.path.join(directory, name), None if force else manifest.icons.get(name))
+                                   for directory, theme, qrc_name, manifest in themes])
+                 for cell, name in zip(cells, names)]
+        with Profile.phase("write icons"):
+            results = cls.write_icons(icons, templates, offset, workers, pool, rcc)
+        if Profile.current is not None:
+            written = [target[0] for (tags, targets), result in zip(icons, results)
+                       for target, variant_result in zip(targets, result) if variant_result[1]]
+            Profile.count("icons written", len(written))
+            Profile.count("bytes out", sum(os.path.getsize(file_name) for file_name in written))
+
+        report = []
+        for i, (directory, theme, qrc_name, manifest) in enumerate(themes):
+            variant_results = [result[i] for result in results]
+            with Profile.phase("manifest"):
+                added, changed, removed = manifest.update(dict(zip(names, [result[0] for result in variant_results])),
+                                                          region is not None)
+                manifest.save()
+            if prune:
+                for name in removed:
+                    if os.path.isfile(os.path.join(directory, name)):
+                        os.remove(os.path.join(directory, name))
+            report.append((theme, len(added), len(changed), len(removed),
+                           sum(result[1] for result in variant_results)))
+
+            if rcc:  # same resource paths as qrc, icons aren't read back from disk
+                with Profile.phase("rcc"):
+                    writer = RCCWriter(level=rcc_level, workers=workers)
+                    writer.add("/icons/%s/index.theme" % theme, templates[i][3].index_theme(theme).encode("utf-8"))
+                    head, tail = templates[i][0].encode("utf-8"), templates[i][1].encode("utf-8")
+                    for resource, (digest, written, body) in zip(resources, variant_results):
+                        writer.add("/icons/%s/scalable/%s" % (theme, resource), head + body + tail)
+                    write_if_changed(os.path.splitext(qrc_name)[0] + ".rcc", writer.build())
+        return report, grid.straddling
 
-        qrc_file.write(file_name_qrc_prefix % (file_name, file_name))
-        index_file.write(index_theme % file_name)
-        index_file.close()
+    @staticmethod
+    def write_icon(tags, offset, templates, targets, keep=False):
+        """icon layer is serialized in memory once, then recolored and hashed per variant template.
+        templates - (prefix, suffix, template hash, variant), targets - (file name, previous hash) per variant.
+        file is written if hash differs from previous. returns hash, whether file was written and
+        utf-8 icon layer if keep per variant"""
+
+        body = io.StringIO()
+        for i, tag in enumerate(tags):
+            if i:
+                body.write("\n")
+            tag.write(body, offset)
+        body = body.getvalue()
+
+        results = []
+        for (prefix, suffix, template_hash, variant), (file_name, previous) in zip(templates, targets):
+            text = variant.recolor(body)
+            encoded = text.encode("utf-8")
+            digest = hashlib.sha1(template_hash + encoded).hexdigest()
+            written = digest != previous or not os.path.isfile(file_name)
+            if written:
+                with open(file_name, "w", encoding="utf-8") as icon_file:
+                    icon_file.write(prefix)
+                    icon_file.write(text)
+                    icon_file.write(suffix)
+            results.append((digest, written, encoded if keep else None))
+        return results
 
-        for key, name in image_dict.items():
-            if key not in tag_dict:
-                continue
+    @classmethod
+    def write_icons(cls, icons, templates, offset, workers=1, pool="thread", keep=False):
+        """write (tags, targets) icons into variant templates by workers threads or processes,
+        0 workers is cpu count. returns write_icon results per icon"""
+
+        for directory in set(os.path.dirname(file_name) for tags, targets in icons for file_name, previous in targets):
+            os.makedirs(directory, exist_ok=True)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(icons) < 2:
+            results = []
+            for tags, targets in icons:
+                Job.progress("icons written", len(results), len(icons))
+                results.append(cls.write_icon(tags, offset, templates, targets, keep))
+            return results
+
+        elif pool == "process":  # icons are handed to processes once, tasks are index ranges
+            step = max(1, len(icons) // (workers * 4))
+            if sys.version_info >= (3, 7):
+                executor = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_icon_template,
+                                                                  initargs=(offset, templates, keep, icons))
+            else:
+                executor = concurrent.futures.ProcessPoolExecutor(workers)
+            with executor:
+                if sys.version_info >= (3, 7):
+                    futures = [executor.submit(_write_icon_range, i, i + step) for i in range(0, len(icons), step)]
+                else:
+                    futures = [executor.submit(_write_icon_list, offset, templates, keep, icons[i:i + step])
+                               for i in range(0, len(icons), step)]
+                cls.wait_icons(futures, len(icons), step)
+                return [result for future in futures for result in future.result()]
 
-            icon_tag.children = tag_dict[key]
-            os.makedirs(os.path.join(output_name, os.path.dirname(name)), exist_ok=True)
-            open(os.path.join(output_name, name), "w", encoding="utf-8").write(tree[0].string())
+        else:
+            with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+                futures = [executor.submit(cls.write_icon, tags, offset, templates, targets, keep)
+                           for tags, targets in icons]
+                cls.wait_icons(futures, len(icons))
+                return [future.result() for future in futures]
 
-            if prefix:
-                qrc_file.write("        <file>%s</file>\n" % name.replace(prefix, "", 1))
-            else:
-                qrc_file.write("        <file>%s</file>\n" % name)
-        qrc_file.write(file_name_qrc_suffix)
-        qrc_file.close()
+    @staticmethod
+    def wait_icons(futures, count, step=1):
+        """report finished icons of job, cancelled job waits only for icons being written"""
+        try:
+            for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                Job.progress("icons written", min((i + 1) * step, count), count)
+        except JobCancelled:
+            Job.cancel_futures(futures)
+            raise
 
     @classmethod
-    def createSortedList(cls, size, current_tag, tag_dict, image_dict):
-        """create list of html objects excluding text"""
-        for tag in current_tag.children:
+    def createSortedList(cls, current_tag, grid):
+        """put html objects excluding text into grid. coordinates are parsed here and moved later by move()"""
+
+        stack = list(reversed(current_tag._children))
+        while stack:
+            tag = stack.pop()
             if tag.tag[:4] == "flow":  # remove text
                 continue
 
             if tag.tag == "image":
-                path = tag.attrs["xlink:href"].replace("\\", "/").replace("..", "upfolder")
-                file_name = os.path.splitext(path)[0]
-                div_x, mod_x = divmod(eval(tag.attrs["x"]) + 1, size)
-                div_y, mod_y = divmod(eval(tag.attrs["y"]) + 1, size)
-                image_dict[(div_x - 1.0, div_y)] = file_name + ".svg"
+                try:
+                    x = parse_number(tag.get_attr("x", "0"))
+                    y = parse_number(tag.get_attr("y", "0"))
+                except ValueError:
+                    continue
+                path = tag.get_attr("xlink:href", "").replace("\\", "/").replace("..", "upfolder")
+                grid.add_label(x, y, os.path.splitext(path)[0] + ".svg")
                 continue
 
-            elif tag.tag == "circle" or tag.tag == "ellipse":
-                div_x, mod_x = divmod(eval(tag.attrs["cx"]), size)
-                div_y, mod_y = divmod(eval(tag.attrs["cy"]), size)
-                tag.attrs["cx"] = str(mod_x)
-                tag.attrs["cy"] = str(mod_y)
-                div_x = int(div_x)
-                div_y = int(div_y)
-                tag_dict[(div_x, div_y)].append(tag)
-
-            elif tag.tag == "rect":
-                div_x, mod_x = divmod(eval(tag.attrs["x"]), size)
-                div_y, mod_y = divmod(eval(tag.attrs["y"]), size)
-                div_x = int(div_x)
-                div_y = int(div_y)
-                tag.attrs["x"] = str(mod_x)
-                tag.attrs["y"] = str(mod_y)
-                tag_dict[(div_x, div_y)].append(tag)
-
-            elif tag.tag == "path":
-                absolute = True
-                last_digit = "M"
-                first_point = True
-                div_x = div_y = 0
-                result = ""
-
-                for chunk in tag.attrs["d"].split():
-                    if chunk in string.ascii_letters:  # letter
-                        absolute = chunk.isupper()
-                        last_digit = chunk
-                        result += " %s" % chunk
-
-                    elif "," not in chunk:  # single value chunk
-                        z = eval(chunk)
-                        if absolute:
-                            div, mod = divmod(z, size)
-                            if last_digit.lower() == "v":  # vertical
-                                div_y = div
-                            else:
-                                div_x = div
-                            result += " %s" % mod
-                        else:
-                            result += " %s" % z
-
-                    else:  # double chunk
-                        x, y = eval(chunk)
-                        if absolute or first_point:
-                            div_x, mod_x = divmod(x, size)
-                            div_y, mod_y = divmod(y, size)
-                            result += " %s,%s" % (mod_x, mod_y)
-                        else:  # relatively add point
-                            result += " %s,%s" % (x, y)
-                        first_point = False
-                div_x = int(div_x)
-                div_y = int(div_y)
-                tag.attrs["d"] = result
-                tag_dict[(div_x, div_y)].append(tag)
-
-            cls.createSortedList(size, tag, tag_dict, image_dict)
-
-
-class Settings(bpy.types.PropertyGroup):
-
-    svg_input = bpy.props.StringProperty(subtype="FILE_PATH")
-    svg_output = bpy.props.StringProperty(subtype="FILE_PATH")
-    svg_qrc = bpy.props.StringProperty(default="RASTER_LIB")
-    svg_size = bpy.props.FloatProperty(name="svg_size", default=2, min=0.1, step=10, precision=1)
-    svg_crop_abs = bpy.props.BoolProperty(name="", default=False)
-    svg_label = bpy.props.BoolProperty(name="", default=False)
-
-
-class Layout(bpy.types.Panel):
-
-    bl_label = "1D SVG Tools"
-    bl_idname = "Andrey_1DSVG_Tools"
-    bl_space_type = 'VIEW_3D'
-    bl_region_type = 'TOOLS'
-    bl_category = '1D'
-    bl_options = {'DEFAULT_CLOSED'}
-
-    def draw(self, context):
-        """col - main column layout. do not rewrite
-        col_in - main column inside every section
-        col_in_n - sub layout"""
-        layout = self.layout
-        column = layout.column(align=True)
-        column.prop(context.scene.amsvg_settings, "svg_input", text="input file or directory")
-        column.prop(context.scene.amsvg_settings, "svg_output", text="output directory")
-        column.prop(context.scene.amsvg_settings, "svg_size", text="max size (MB)")
-        column.prop(context.scene.amsvg_settings, "svg_crop_abs", text="crop absolute names")
-        column.prop(context.scene.amsvg_settings, "svg_label", text="slice transformed")
-        column.operator("mesh.am1dsvg_svg_split", text="SVG input split")
-        column.operator("mesh.am1dsvg_svg_merge", text="SVG output merge")
-        column.operator("mesh.am1dsvg_svg_parse_images", text="SVG parse images")
-        column.operator("mesh.am1dsvg_svg_copy_images", text="SVG copy images")
-        column.operator("mesh.am1dsvg_svg_icon_slicer", text="SVG Icon Slicer")
+            try:
+                if tag.tag == "circle" or tag.tag == "ellipse":
+                    x, y = parse_number(tag.get_attr("cx", "0")), parse_number(tag.get_attr("cy", "0"))
+                    if tag.tag == "circle":
+                        rx = ry = parse_number(tag.get_attr("r", "0"))
+                    else:
+                        rx, ry = parse_number(tag.get_attr("rx", "0")), parse_number(tag.get_attr("ry", "0"))
+                    grid.add_shape((tag, ("cx", "cy"), [x, y], ((0, 0), (1, 1))), (x, y),
+                                   (x - rx, y - ry, x + rx, y + ry))
+
+                elif tag.tag == "rect":
+                    x, y = parse_number(tag.get_attr("x", "0")), parse_number(tag.get_attr("y", "0"))
+                    width, height = parse_number(tag.get_attr("width", "0")), parse_number(tag.get_attr("height", "0"))
+                    grid.add_shape((tag, ("x", "y"), [x, y], ((0, 0), (1, 1))), (x, y), (x, y, x + width, y + height))
+
+                elif tag.tag == "path":
+                    commands, numbers = PathData.parse(tag.get_attr("d", ""))
+                    positions = PathData.absolute(commands)
+                    if positions:
+                        anchor = [None, None]
+                        for i, axis in positions:
+                            numbers[i] = float(numbers[i])
+                            if anchor[axis] is None:
+                                anchor[axis] = numbers[i]
+                        grid.add_shape((tag, commands, numbers, positions), (anchor[0] or 0.0, anchor[1] or 0.0),
+                                       PathData.bounds(commands, numbers))
+            except ValueError:
+                pass
+
+            stack.extend(reversed(tag._children))
+
+    @classmethod
+    def move(cls, grid, cells):
+        """move shapes of cells by one batched pass into origin, {cell: tags in document order}"""
+
+        shapes = []
+        origins = []  # cell of shape
+        values = []  # translated coordinates of all shapes
+        axes = []  # 0 - x, 1 - y per value
+        owners = []  # shape index per value
+        for cell in cells:
+            for index in grid.cells[cell]:
+                shape = grid.shapes[index][0]
+                numbers = shape[2]
+                for i, axis in shape[3]:
+                    values.append(numbers[i])
+                    axes.append(axis)
+                    owners.append(len(shapes))
+                shapes.append(shape)
+                origins.append(cell)
+
+        values = cls.translate(grid.size, origins, values, axes, owners)
+        tag_dict = collections.defaultdict(list)
+        start = 0
+        precision = cls.PRECISION
+        for (tag, names, numbers, positions), cell in zip(shapes, origins):
+            for i, axis in positions:
+                numbers[i] = format_number(values[start], precision)
+                start += 1
+            if names[0].__class__ is str:
+                for name, number in zip(names, numbers):
+                    tag.attrs[name] = number
+            else:
+                tag.attrs["d"] = PathData.format(names, numbers)
+            tag_dict[cell].append(tag)
+        if Profile.current is not None:
+            Profile.count("shapes moved", len(shapes))
+            Profile.count("paths rewritten", sum(shape[1][0].__class__ is not str for shape in shapes))
+        return tag_dict
+
+    @staticmethod
+    def translate(size, cells, values, axes, owners):
+        """values moved by origin of their owner cell, by numpy if available"""
+
+        if numpy is not None and values:
+            origins = numpy.array(cells, dtype=float) * size
+            return (numpy.array(values, dtype=float) - origins[owners, axes]).tolist()
+
+        return [value - cells[owner][axis] * size for value, owner, axis in zip(values, owners, axes)]
+
+
+def region_type(text):
+    """command line cell region, four integers separated by comma"""
+    try:
+        region = tuple(int(value) for value in text.split(","))
+    except ValueError:
+        region = ()
+    if len(region) != 4 or region[0] > region[2] or region[1] > region[3]:
+        raise argparse.ArgumentTypeError("%r isn't first column,first row,last column,last row" % text)
+    return region
+
+
+def main(argv=None):
+    """command line entry point, runs methods without blender"""
+
+    parser = argparse.ArgumentParser(prog="1D_SVG_Tools", description="1D SVG Tools")
+    parser.add_argument("--parser", choices=list(PARSER_BACKENDS), help="svg parser backend, fastest by default")
+    parser.add_argument("--mmap", action="store_true", help="feed svg parser from memory map")
+    parser.add_argument("--profile", metavar="JSON", help="write phase times and counters of method into json file")
+    parser.add_argument("--trace-memory", action="store_true", help="add peak python memory to profile")
+    parser.add_argument("--cache", metavar="DIRECTORY", help="keep parsed trees of unchanged files in directory")
+    parser.add_argument("--cache-verify", action="store_true", help="compare content hash of cached files too")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    command = commands.add_parser("split", help="split svg file or directory into pieces not exceeding max size")
+    command.add_argument("input", help="svg file or directory")
+    command.add_argument("-o", "--output", default="", help="output directory, empty for input directory")
+    command.add_argument("--size", type=float, default=2, help="max size (MB)")
+    command.add_argument("--workers", type=int, default=1, help="workers splitting files, 0 for cpu count")
+    command.add_argument("--pool", choices=("thread", "process"), default="process", help="file splitting workers kind")
+    command.add_argument("--passthrough", action="store_true",
+                         help="copy source bytes instead of serializing elements, comments are kept")
+
+    command = commands.add_parser("merge", help="merge svg files of directory into MERGE.SVG")
+    command.add_argument("input", help="directory with svg files")
+    command.add_argument("-o", "--output", default="", help="output directory, empty for input directory")
+    command.add_argument("--dedupe", action="store_true", help="keep one copy of identical definitions")
+
+    command = commands.add_parser("parse-images", help="scan svg file for external image links")
+    command.add_argument("input", help="svg file")
+    command.add_argument("--crop-abs", action="store_true", help="search absolute names near svg file")
+
+    command = commands.add_parser("copy-images", help="copy images linked by svg file into one directory")
+    command.add_argument("input", help="svg file")
+    command.add_argument("-o", "--output", default="", help="output directory, empty for input directory")
+    command.add_argument("--crop-abs", action="store_true", help="search absolute names near svg file")
+    command.add_argument("--workers", type=int, default=1, help="copying threads, 0 for cpu count")
+    command.add_argument("--checksum", action="store_true",
+                         help="compare content of existing files differing by mtime only")
+
+    command = commands.add_parser("extract-images", help="move embedded base64 images into linked files")
+    command.add_argument("input", help="svg file")
+    command.add_argument("-o", "--output", default="", help="output directory, empty to rewrite input")
+    command.add_argument("--images", default="", help="image directory, empty for \"output file_images\"")
+
+    command = commands.add_parser("inline-images", help="embed linked image files as base64 data")
+    command.add_argument("input", help="svg file")
+    command.add_argument("-o", "--output", default="", help="output directory, empty to rewrite input")
+
+    command = commands.add_parser("slice", help="slice svg file into icon files")
+    command.add_argument("input", help="svg file")
+    command.add_argument("-o", "--output", default="", help="output directory")
+    command.add_argument("--transformed", action="store_true",
+                         help="move transformed objects into TranMatrix layer instead of slicing")
+    command.add_argument("--workers", type=int, default=1, help="icon writing workers, 0 for cpu count")
+    command.add_argument("--pool", choices=("thread", "process"), default="thread", help="icon writing workers kind")
+    command.add_argument("--region", type=region_type,
+                         help="cells to slice: first column,first row,last column,last row")
+    command.add_argument("--straddle", choices=IconGrid.STRADDLE, default="anchor",
+                         help="cell of shape crossing cell border")
+    command.add_argument("--force", action="store_true", help="rewrite icons not changed since last slicing")
+    command.add_argument("--prune", action="store_true", help="delete icons removed from sheet since last slicing")
+    command.add_argument("--rcc", action="store_true", help="write binary qt resource next to qrc")
+    command.add_argument("--variants", help="json file of color and size variants, written into subdirectories")
+    command.add_argument("--rcc-level", type=int, default=-1, choices=range(-1, 10), metavar="LEVEL",
+                         help="zlib level of rcc, 0 - no compression")
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.input):
+        parser.error("%s doesn't exist" % args.input)
+    if args.parser:
+        if not PARSER_BACKENDS[args.parser].available():
+            parser.error("%s parser backend isn't available" % args.parser)
+        StructureBuilder.BACKEND = args.parser
+    StructureBuilder.MMAP = args.mmap
+    if args.cache:
+        StructureBuilder.CACHE = TreeCache(directory=args.cache, verify=args.cache_verify)
+
+    if args.profile:
+        with Profile(args.command, args.trace_memory) as profile:
+            result = run_command(parser, args)
+        print(profile.report(), file=sys.stderr)
+        profile.save(args.profile)
+        return result
+    return run_command(parser, args)
+
+
+def run_command(parser, args):
+    """run method of parsed command line, returns exit code"""
+
+    if args.command == "split":
+        files = SVGSplit.run(args.input, args.output, args.size * 2 ** 20, args.workers, args.passthrough, args.pool)
+        for file, parts in files:
+            print("%s: %i parts" % (file, len(parts)))
+            for part in parts:
+                print("    %s" % part)
+        print("%i files split into %i parts" % (len(files), sum(len(parts) for file, parts in files)))
+
+    elif args.command == "merge":
+        output_name, saved, unmerged = SVGMerge.main(args.input, args.output, args.dedupe)
+        if output_name is None:
+            print("no svg files found in %s" % args.input, file=sys.stderr)
+            return 1
+        for file in unmerged:
+            print("%s: definitions aren't merged, expat can't read it" % file, file=sys.stderr)
+        print(output_name)
+        if args.dedupe:
+            print("%i bytes of repeated definitions removed" % saved)
+
+    elif args.command == "parse-images":
+        print(SVGParseImages.report(*SVGParseImages.parse(args.input, args.crop_abs)))
+
+    elif args.command == "copy-images":
+        files = SVGCopyImages.main(args.input, args.output, args.crop_abs, workers=args.workers,
+                                   checksum=args.checksum)
+        for source, target, copied in files:
+            print("%s -> %s%s" % (source, target, "" if copied else " (unchanged)"))
+        print("%i files copied, %i unchanged" % (sum(copied for source, target, copied in files),
+                                                   sum(not copied for source, target, copied in files)))
+
+    elif args.command == "extract-images":
+        try:
+            output_name, links, images = EmbeddedImages.extract(args.input, args.output, args.images)
+        except ValueError as error:
+            print("%s: %s" % (args.input, error), file=sys.stderr)
+            return 1
+        print("%s: %i embedded images extracted into %i files, %i bytes" % (output_name, links, len(images),
+                                                                            os.path.getsize(output_name)))
+
+    elif args.command == "inline-images":
+        output_name, links = EmbeddedImages.inline(args.input, args.output)
+        print("%s: %i images embedded, %i bytes" % (output_name, links, os.path.getsize(output_name)))
+
+    elif args.command == "slice":
+        if args.rcc and args.region:
+            parser.error("--rcc needs whole sheet, it can't be used with --region")
+        variants = None
+        if args.variants:
+            try:
+                variants = IconVariant.load(args.variants)
+            except (OSError, ValueError) as error:
+                parser.error("can't read variants: %s" % error)
+        if args.transformed:
+            result = SVGTransformChecker.execute(args.input, args.output)
+            if result != {"FINISHED"}:
+                result = None
+        else:
+            result = SVGIconSplitter.execute(args.input, args.output, args.workers, args.pool, args.region,
+                                             args.straddle, args.force, args.prune, args.rcc, args.rcc_level,
+                                             variants)
+            if result is not None:
+                report, straddling = result
+                if straddling:
+                    print("%i shapes cross cell border, straddle policy %s" % (straddling, args.straddle))
+                for theme, added, changed, removed, written in report:
+                    print("%s icons: %i added, %i changed, %i removed, %i written" % (theme, added, changed,
+                                                                                     removed, written))
+        if result is None:
+            print("%s must contain single svg root" % args.input, file=sys.stderr)
+            return 1
+
+    return 0
+
+
+def _blender_classes():
+    """settings, operators and panel. bpy is imported here so the engine works without blender"""
+
+    import bpy
+
+    class Settings(bpy.types.PropertyGroup):
+
+        svg_input = bpy.props.StringProperty(subtype="FILE_PATH")
+        svg_output = bpy.props.StringProperty(subtype="FILE_PATH")
+        svg_qrc = bpy.props.StringProperty(default="RASTER_LIB")
+        svg_size = bpy.props.FloatProperty(name="svg_size", default=2, min=0.1, step=10, precision=1)
+        svg_crop_abs = bpy.props.BoolProperty(name="", default=False)
+        svg_label = bpy.props.BoolProperty(name="", default=False)
+        svg_workers = bpy.props.IntProperty(name="svg_workers", default=1, min=0)
+        svg_rcc = bpy.props.BoolProperty(name="", default=False)
+        svg_dedupe = bpy.props.BoolProperty(name="", default=False)
+        svg_passthrough = bpy.props.BoolProperty(name="", default=False)
+        svg_variants = bpy.props.StringProperty(subtype="FILE_PATH")
+        svg_profile = bpy.props.BoolProperty(name="", default=False)
+        svg_profile_memory = bpy.props.BoolProperty(name="", default=False)
+        svg_cache = bpy.props.BoolProperty(name="", default=True)
+        svg_cache_size = bpy.props.IntProperty(name="svg_cache_size", default=256, min=1)
+        svg_cache_dir = bpy.props.StringProperty(subtype="DIR_PATH")
+
+    def submit(name, function, args=(), kwargs=None, finish=None):
+        """queue job and start timer running queue unless it runs already"""
+        settings = bpy.context.scene.amsvg_settings
+        profile = Profile(name, settings.svg_profile_memory) if settings.svg_profile else None
+        _tree_cache.budget = settings.svg_cache_size * 2 ** 20
+        _tree_cache.directory = bpy.path.abspath(settings.svg_cache_dir) if settings.svg_cache_dir else None
+        StructureBuilder.CACHE = _tree_cache if settings.svg_cache else None
+        _job_queue.submit(Job(name, function, args, kwargs, finish, profile))
+        if not SVGJobsOperator.running:
+            bpy.ops.mesh.am1dsvg_svg_jobs("INVOKE_DEFAULT")
+
+    class SVGJobsOperator(bpy.types.Operator):
+        """runs queued jobs on their own threads, timer polls them and redraws panel with progress"""
+
+        bl_idname = "mesh.am1dsvg_svg_jobs"
+        bl_label = "SVG jobs"
+
+        running = False
+        timer = None
+
+        def invoke(self, context, event):
+            if SVGJobsOperator.running:
+                return {"CANCELLED"}
+            SVGJobsOperator.running = True
+            self.timer = context.window_manager.event_timer_add(0.2, context.window)
+            context.window_manager.modal_handler_add(self)
+            return {"RUNNING_MODAL"}
+
+        def modal(self, context, event):
+            if event.type != "TIMER":
+                return {"PASS_THROUGH"}
+
+            job = _job_queue.poll()
+            if job is not None:
+                if job.profile is not None:
+                    if "svg profile" in bpy.data.texts:
+                        text_block = bpy.data.texts["svg profile"]
+                    else:
+                        text_block = bpy.data.texts.new(name="svg profile")
+                    text_block.clear()
+                    text_block.write(job.profile.report())
+                if job.error:
+                    print(job.error)
+                    self.report({"ERROR"}, "%s failed: %s" % (job.name, job.error.strip().splitlines()[-1]))
+                elif job.cancelled:
+                    self.report({"WARNING"}, "%s cancelled" % job.name)
+                else:
+                    message = job.finish(job) if job.finish is not None else None    # finish may return report
+                    self.report({"INFO"}, message or "%s finished" % job.name)
+            if context.screen is not None:
+                for area in context.screen.areas:
+                    if area.type == "VIEW_3D":
+                        area.tag_redraw()
+
+            if not _job_queue.busy:
+                context.window_manager.event_timer_remove(self.timer)
+                SVGJobsOperator.running = False
+                return {"FINISHED"}
+            return {"PASS_THROUGH"}
+
+    class SVGCancelOperator(bpy.types.Operator):
+
+        bl_idname = "mesh.am1dsvg_svg_cancel"
+        bl_label = "SVG cancel jobs"
+
+        def execute(self, context):
+            _job_queue.cancel()
+            return {"FINISHED"}
+
+    class SVGSplitOperator(bpy.types.Operator):
+
+        bl_idname = "mesh.am1dsvg_svg_split"
+        bl_label = "SVG inout split"
+        bl_options = {'REGISTER', 'UNDO'}
+
+        def execute(self, context):
+            settings = context.scene.amsvg_settings
+            submit("SVG split", SVGSplit.run,
+                   (settings.svg_input, settings.svg_output, settings.svg_size * 2 ** 20,  # convert mb to bytes
+                    settings.svg_workers, settings.svg_passthrough, "thread"))  # blender can't spawn python
+            return {"FINISHED"}
+
+    class SVGMergeOperator(bpy.types.Operator):
+
+        bl_idname = "mesh.am1dsvg_svg_merge"
+        bl_label = "SVG output merge"
+        bl_options = {'REGISTER', 'UNDO'}
+
+        @staticmethod
+        def finish(job):
+            output_name, saved, unmerged = job.result
+            if output_name is None:
+                return "SVG merge: no svg files found"
+            message = "SVG merge: %s" % output_name
+            if saved:
+                message += ", %i bytes of repeated definitions removed" % saved
+            if unmerged:
+                message += ", definitions of %i unreadable parts aren't merged" % len(unmerged)
+            return message
+
+        def execute(self, context):
+            settings = context.scene.amsvg_settings
+            if os.path.isdir(settings.svg_output):
+                submit("SVG merge", SVGMerge.main, (settings.svg_output, None, settings.svg_dedupe),
+                       finish=self.finish)
+            return {"FINISHED"}
+
+    class SVGParseImagesOperator(bpy.types.Operator):
+
+        bl_idname = "mesh.am1dsvg_svg_parse_images"
+        bl_label = "SVG parse images"
+        bl_options = {'REGISTER', 'UNDO'}
+
+        @staticmethod
+        def finish(job):
+            if "svg parse images" in bpy.data.texts:
+                text_block = bpy.data.texts["svg parse images"]
+            else:
+                text_block = bpy.data.texts.new(name="svg parse images")
+            text_block.clear()
+            text_block.write(SVGParseImages.report(*job.result))
+
+        def execute(self, context):
+            settings = context.scene.amsvg_settings
+            if not os.path.exists(settings.svg_input):
+                return {"FINISHED"}
+
+            submit("SVG parse images", SVGParseImages.parse, (settings.svg_input, settings.svg_crop_abs),
+                   finish=self.finish)
+            return {"FINISHED"}
+
+    class SVGCopyImagesOperator(bpy.types.Operator):
+
+        bl_idname = "mesh.am1dsvg_svg_copy_images"
+        bl_label = "SVG copy images"
+        bl_options = {'REGISTER', 'UNDO'}
+
+        def execute(self, context):
+            settings = context.scene.amsvg_settings
+            if os.path.exists(settings.svg_input):
+                submit("SVG copy images", SVGCopyImages.main,
+                       (settings.svg_input, settings.svg_output, settings.svg_crop_abs),
+                       {"workers": settings.svg_workers})
+            return {"FINISHED"}
+
+    class SVGIconSlicerOperator(bpy.types.Operator):
+
+        bl_idname = "mesh.am1dsvg_svg_icon_slicer"
+        bl_label = "SVG icon slicer"
+        bl_options = {'REGISTER', 'UNDO'}
+
+        @staticmethod
+        def finish(job):
+            if job.result is None:
+                return "SVG icon slicer: input must contain single svg root"
+            report, straddling = job.result
+            message = "; ".join("%s icons: %i added, %i changed, %i removed, %i written" % theme for theme in report)
+            if straddling:
+                message += "; %i shapes cross cell border" % straddling
+            return message
+
+        def execute(self, context):
+            settings = context.scene.amsvg_settings
+            if settings.svg_label:
+                submit("SVG slice transformed", SVGTransformChecker.execute,
+                       (settings.svg_input, settings.svg_output))
+            else:
+                variants = None
+                if settings.svg_variants:
+                    try:
+                        variants = IconVariant.load(bpy.path.abspath(settings.svg_variants))
+                    except (OSError, ValueError) as error:
+                        self.report({"ERROR"}, "can't read variants: %s" % error)
+                        return {"CANCELLED"}
+                submit("SVG icon slicer", SVGIconSplitter.execute,
+                       (settings.svg_input, settings.svg_output, settings.svg_workers),
+                       {"rcc": settings.svg_rcc, "variants": variants}, finish=self.finish)
+            return {"FINISHED"}
+
+    class Layout(bpy.types.Panel):
+
+        bl_label = "1D SVG Tools"
+        bl_idname = "Andrey_1DSVG_Tools"
+        bl_space_type = 'VIEW_3D'
+        bl_region_type = 'TOOLS'
+        bl_category = '1D'
+        bl_options = {'DEFAULT_CLOSED'}
+
+        def draw(self, context):
+            """col - main column layout. do not rewrite
+            col_in - main column inside every section
+            col_in_n - sub layout"""
+            layout = self.layout
+            column = layout.column(align=True)
+            column.prop(context.scene.amsvg_settings, "svg_input", text="input file or directory")
+            column.prop(context.scene.amsvg_settings, "svg_output", text="output directory")
+            column.prop(context.scene.amsvg_settings, "svg_size", text="max size (MB)")
+            column.prop(context.scene.amsvg_settings, "svg_passthrough", text="split passthrough")
+            column.prop(context.scene.amsvg_settings, "svg_crop_abs", text="crop absolute names")
+            column.prop(context.scene.amsvg_settings, "svg_label", text="slice transformed")
+            column.prop(context.scene.amsvg_settings, "svg_workers", text="workers (0 - all cores)")
+            column.prop(context.scene.amsvg_settings, "svg_rcc", text="write rcc")
+            column.prop(context.scene.amsvg_settings, "svg_dedupe", text="merge repeated definitions")
+            column.prop(context.scene.amsvg_settings, "svg_variants", text="variants json")
+            column.prop(context.scene.amsvg_settings, "svg_profile", text="profile into \"svg profile\" text")
+            column.prop(context.scene.amsvg_settings, "svg_profile_memory", text="profile memory")
+            column.prop(context.scene.amsvg_settings, "svg_cache", text="cache parsed files")
+            column.prop(context.scene.amsvg_settings, "svg_cache_size", text="cache size (MB)")
+            column.prop(context.scene.amsvg_settings, "svg_cache_dir", text="cache directory")
+            column.operator("mesh.am1dsvg_svg_split", text="SVG input split")
+            column.operator("mesh.am1dsvg_svg_merge", text="SVG output merge")
+            column.operator("mesh.am1dsvg_svg_parse_images", text="SVG parse images")
+            column.operator("mesh.am1dsvg_svg_copy_images", text="SVG copy images")
+            column.operator("mesh.am1dsvg_svg_icon_slicer", text="SVG Icon Slicer")
+
+            job = _job_queue.current
+            if job is not None:
+                box = layout.box()
+                box.label(text=job.text())
+                if _job_queue.jobs:
+                    box.label(text="%i jobs queued" % len(_job_queue.jobs))
+                box.operator("mesh.am1dsvg_svg_cancel", text="Cancel")
+
+    return (Settings, SVGJobsOperator, SVGCancelOperator, SVGSplitOperator, SVGMergeOperator, SVGParseImagesOperator,
+            SVGCopyImagesOperator, SVGIconSlicerOperator, Layout)
+
+
+_classes = ()   # registered blender classes, settings first
+_job_queue = JobQueue()     # operators run tools as jobs of this queue, one at a time
+_tree_cache = TreeCache()   # parsed files of blender session, settings are applied by every submit
 
 
 def register():
-    bpy.utils.register_module(__name__)
+    global _classes
+    import bpy
+    _classes = _blender_classes()
+    for cls in _classes:
+        bpy.utils.register_class(cls)
     bpy.types.Scene.am_tool = bpy.props.PointerProperty(type=bpy.types.PropertyGroup)
-    bpy.types.Scene.amsvg_settings = bpy.props.PointerProperty(type=Settings)
+    bpy.types.Scene.amsvg_settings = bpy.props.PointerProperty(type=_classes[0])
 
 
 def unregister():
-    bpy.utils.unregister_module(__name__)
-    del bpy.types.Scene.my_tool
+    global _classes
+    import bpy
+    _job_queue.cancel()
+    _tree_cache.clear()
+    StructureBuilder.CACHE = None
+    del bpy.types.Scene.amsvg_settings
+    del bpy.types.Scene.am_tool
+    for cls in reversed(_classes):
+        bpy.utils.unregister_class(cls)
+    _classes = ()
 
 
 if __name__ == "__main__":
+    try:
+        import bpy  # run from blender text editor
+    except ImportError:
+        bpy = None
+    if bpy is None:
+        sys.exit(main())
     register()
@@ -0,0 +1,65 @@
+"""
+parse throughput of StructureBuilder backends in MB/s and traced memory of built tree per TagUnit
+
+python benchmarks/bench_parse.py [file.svg ...] [--columns 40 --rows 40 --paths 20] [--repeat 3]
+without files synthetic base sheet is generated
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+from common import load_tools, generate_sheet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--paths", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tools = load_tools()
+    temp_dir = tempfile.TemporaryDirectory()
+    files = args.files or [generate_sheet(os.path.join(temp_dir.name, "sheet.svg"), args.columns, args.rows,
+                                          args.paths)]
+
+    print("%-40s %-8s %10s %10s %12s" % ("file", "backend", "seconds", "MB/s", "bytes/node"))
+    for file_name in files:
+        size = os.path.getsize(file_name) / 2 ** 20
+        for name, backend in tools.PARSER_BACKENDS.items():
+            if not backend.available():
+                print("%-40s %-8s %10s %10s" % (os.path.basename(file_name), name, "-", "missing"))
+                continue
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                tools.StructureBuilder(file_name, name)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            tracemalloc.start()
+            root = tools.StructureBuilder(file_name, name).root
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            nodes = 0
+            stack = list(root)
+            while stack:
+                tag = stack.pop()
+                nodes += 1
+                stack.extend(tag.children)
+            del root
+            print("%-40s %-8s %10.3f %10.2f %12i" % (os.path.basename(file_name), name, best, size / best,
+                                                     memory / max(nodes, 1)))
+        print("%-40s default: %s" % ("", tools.StructureBuilder.default_backend()))
+    temp_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
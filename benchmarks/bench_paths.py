@@ -0,0 +1,132 @@
+"""
+coordinate moving of SVGIconSplitter: old eval() per chunk against PathData tokenizer with batched translation,
+with numpy if installed and without it
+
+python benchmarks/bench_paths.py [--paths 20000] [--repeat 3]
+"""
+
+import sys
+import time
+import random
+import string
+import argparse
+
+from common import load_tools
+
+
+def eval_paths(paths, size):
+    """path branch of createSortedList before PathData"""
+    results = []
+    for d in paths:
+        absolute = True
+        last_digit = "M"
+        first_point = True
+        div_x = div_y = 0
+        result = ""
+
+        for chunk in d.split():
+            if chunk in string.ascii_letters:  # letter
+                absolute = chunk.isupper()
+                last_digit = chunk
+                result += " %s" % chunk
+
+            elif "," not in chunk:  # single value chunk
+                z = eval(chunk)
+                if absolute:
+                    div, mod = divmod(z, size)
+                    if last_digit.lower() == "v":  # vertical
+                        div_y = div
+                    else:
+                        div_x = div
+                    result += " %s" % mod
+                else:
+                    result += " %s" % z
+
+            else:  # double chunk
+                x, y = eval(chunk)
+                if absolute or first_point:
+                    div_x, mod_x = divmod(x, size)
+                    div_y, mod_y = divmod(y, size)
+                    result += " %s,%s" % (mod_x, mod_y)
+                else:  # relatively add point
+                    result += " %s,%s" % (x, y)
+                first_point = False
+        results.append(((int(div_x), int(div_y)), result))
+    return results
+
+
+def engine_paths(tools, paths, size):
+    """PathData parse, cell of first point by IconGrid, one translate call for all paths, format"""
+    grid = tools.IconGrid(size)
+    shapes = []
+    cells = []
+    values = []
+    axes = []
+    owners = []
+    for d in paths:
+        commands, numbers = tools.PathData.parse(d)
+        positions = tools.PathData.absolute(commands)
+        for i, axis in positions:
+            numbers[i] = float(numbers[i])
+            values.append(numbers[i])
+            axes.append(axis)
+            owners.append(len(shapes))
+        cells.append(grid.cell(numbers[positions[0][0]], numbers[positions[1][0]]))
+        shapes.append((commands, numbers, positions))
+    values = tools.SVGIconSplitter.translate(size, cells, values, axes, owners)
+    start = 0
+    results = []
+    for (commands, numbers, positions), cell in zip(shapes, cells):
+        for i, axis in positions:
+            numbers[i] = tools.format_number(values[start], 6)
+            start += 1
+        results.append((cell, tools.PathData.format(commands, numbers)))
+    return results
+
+
+def generate_paths(count, size=64, columns=40, seed=0):
+    rnd = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        x = round(rnd.uniform(0, size * columns), 3)
+        y = round(rnd.uniform(0, size * columns), 3)
+        if rnd.random() < 0.5:
+            paths.append("M %s,%s L %s,%s %s,%s %s,%s Z" % (x, y, x + 10, y, x + 10, y + 10.5, x, y + 10.5))
+        else:
+            paths.append("m %s,%s c 1.5,2.25 3.125,4 5,6 l 3,0 h 4.5 v 5 c -2,1 -3,1 -4.25,0.5 z" % (x, y))
+    return paths
+
+
+def best(function, repeat):
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        result = elapsed if result is None else min(result, elapsed)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tools = load_tools()
+    paths = generate_paths(args.paths)
+    timings = [("eval", best(lambda: eval_paths(paths, 64), args.repeat))]
+    if tools.numpy is not None:
+        timings.append(("PathData + numpy", best(lambda: engine_paths(tools, paths, 64), args.repeat)))
+    numpy, tools.numpy = tools.numpy, None
+    timings.append(("PathData", best(lambda: engine_paths(tools, paths, 64), args.repeat)))
+    tools.numpy = numpy
+
+    print("%-20s %10s %12s %8s" % ("method", "seconds", "us/path", "speedup"))
+    for name, seconds in timings:
+        print("%-20s %10.3f %12.2f %8.1f" % (name, seconds, seconds / len(paths) * 1e6, timings[0][1] / seconds))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
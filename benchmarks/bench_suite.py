@@ -0,0 +1,202 @@
+"""
+wall time, throughput and peak traced memory of every tool on synthetic COIL style base sheet, blender isn't needed
+
+python benchmarks/bench_suite.py [--columns 20 --rows 20 --paths 10 --depth 2] [--transforms 0.1] [--images 4]
+    [--only split,merge] [--repeat 3] [-o results.json] [--compare baseline.json] [--threshold 0.1]
+throughput is sheet megabytes per second of best run, memory is peak of python allocations of separate traced run.
+-o writes results as json, --compare reads such file and flags operations slower or heavier than threshold share,
+exit code is 1 when any operation regressed. compare results of the same sheet parameters and machine only
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+
+from common import load_tools, generate_sheet
+from bench_paths import engine_paths, generate_paths
+
+
+def parse_tree(tools, sheet):
+    return tools.StructureBuilder(sheet).root[0]
+
+
+def operations(tools, sheet, work_dir):
+    """(name, setup) pairs, setup returns function timed by benchmark. setup work isn't measured"""
+
+    def parse(backend):
+        return lambda: lambda: tools.StructureBuilder(sheet, backend)
+
+    def parse_cached():
+        cache = tools.TreeCache()
+
+        def run():
+            tools.StructureBuilder.CACHE = cache
+            try:
+                tools.StructureBuilder(sheet)
+            finally:
+                tools.StructureBuilder.CACHE = None
+        run()   # fill cache
+        return run
+
+    def write():
+        tree = parse_tree(tools, sheet)
+        return lambda: tree.write(io.StringIO())
+
+    def sorted_list():
+        tree = parse_tree(tools, sheet)
+        return lambda: tools.SVGIconSplitter.createSortedList(tree, tools.IconGrid(int(tree.attrs["width"])))
+
+    def split(passthrough):
+        output = os.path.join(work_dir, "split_passthrough" if passthrough else "split")
+        return lambda: tools.SVGSplit.run(sheet, output, os.path.getsize(sheet) / 8, passthrough=passthrough)
+
+    def merge(dedupe):
+        parts = os.path.join(work_dir, "parts")
+        if not os.path.isdir(parts):
+            tools.SVGSplit.run(sheet, parts, os.path.getsize(sheet) / 8)
+        output = os.path.join(work_dir, "merge_dedupe" if dedupe else "merge")
+        return lambda: tools.SVGMerge.main(parts, output, dedupe)
+
+    def paths():
+        shapes = generate_paths(20000)
+        return lambda: engine_paths(tools, shapes, 64)
+
+    def extract_images():
+        output = os.path.join(work_dir, "extract")
+        return lambda: tools.EmbeddedImages.extract(sheet, output)
+
+    def slice_icons(transformed):
+        output = os.path.join(work_dir, "transformed" if transformed else "icons")
+        if transformed:
+            os.makedirs(output, exist_ok=True)
+            return lambda: tools.SVGTransformChecker.execute(sheet, output)
+        return lambda: tools.SVGIconSplitter.execute(sheet, output, force=True)
+
+    result = [("parse-%s" % name, parse(name)) for name, backend in tools.PARSER_BACKENDS.items()
+              if backend.available()]
+    result.extend([
+        ("parse-cached", parse_cached),
+        ("write", write),
+        ("sorted-list", sorted_list),
+        ("paths", paths),
+        ("split", lambda: split(False)),
+        ("split-passthrough", lambda: split(True)),
+        ("merge", lambda: merge(False)),
+        ("merge-dedupe", lambda: merge(True)),
+        ("parse-images", lambda: lambda: tools.SVGParseImages.parse(sheet)),
+        ("extract-images", extract_images),
+        ("slice", lambda: slice_icons(False)),
+        ("slice-transformed", lambda: slice_icons(True)),
+    ])
+    return result
+
+
+def measure(function, repeat):
+    """best seconds of repeat runs and peak traced bytes of one more run"""
+
+    best = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def compare(results, baseline, threshold):
+    """print ratios against baseline, returns names of regressed operations"""
+
+    if results["sheet"] != baseline["sheet"]:
+        print("warning: baseline sheet differs: %s" % json.dumps(baseline["sheet"], sort_keys=True))
+    regressed = []
+    print("%-20s %10s %10s %8s %10s %10s %8s" % ("operation", "seconds", "baseline", "ratio", "peak MB", "baseline",
+                                                  "ratio"))
+    for name, result in results["operations"].items():
+        old = baseline["operations"].get(name)
+        if old is None:
+            print("%-20s %10.3f %10s" % (name, result["seconds"], "new"))
+            continue
+        time_ratio = result["seconds"] / old["seconds"] if old["seconds"] else 1.0
+        memory_ratio = result["peak_mb"] / old["peak_mb"] if old["peak_mb"] else 1.0
+        flags = []
+        if time_ratio > 1 + threshold:
+            flags.append("SLOWER")
+        if memory_ratio > 1 + threshold:
+            flags.append("MORE MEMORY")
+        if flags:
+            regressed.append(name)
+        print("%-20s %10.3f %10.3f %8.2f %10.2f %10.2f %8.2f %s" % (name, result["seconds"], old["seconds"], time_ratio,
+                                                                    result["peak_mb"], old["peak_mb"], memory_ratio,
+                                                                    " ".join(flags)))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--paths", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--transforms", type=float, default=0.1, help="share of icons with transform")
+    parser.add_argument("--images", type=int, default=4, help="embedded base64 images")
+    parser.add_argument("--image-size", type=int, default=65536, help="bytes of embedded image")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", default="", help="comma separated operation names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="write results json")
+    parser.add_argument("--compare", help="baseline results json")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed share of slowdown and memory growth")
+    args = parser.parse_args()
+
+    tools = load_tools()
+    only = set(name for name in args.only.split(",") if name)
+    sheet_args = {"columns": args.columns, "rows": args.rows, "paths": args.paths, "depth": args.depth,
+                  "transforms": args.transforms, "images": args.images, "image_size": args.image_size,
+                  "seed": args.seed}
+    with tempfile.TemporaryDirectory() as work_dir:
+        sheet = generate_sheet(os.path.join(work_dir, "sheet.svg"), **sheet_args)
+        size = os.path.getsize(sheet)
+        results = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                   "platform": platform.platform(), "numpy": tools.numpy is not None,
+                   "sheet": dict(sheet_args, bytes=size), "operations": {}}
+
+        print("sheet %.2f MB, %s" % (size / 2 ** 20, ", ".join("%s %s" % item for item in sorted(sheet_args.items()))))
+        print("%-20s %10s %10s %10s" % ("operation", "seconds", "MB/s", "peak MB"))
+        for name, setup in operations(tools, sheet, work_dir):
+            if only and name not in only:
+                continue
+            seconds, peak = measure(setup(), args.repeat)
+            results["operations"][name] = {"seconds": round(seconds, 6), "mb_per_s": round(size / 2 ** 20 / seconds, 3),
+                                           "peak_mb": round(peak / 2 ** 20, 3)}
+            print("%-20s %10.3f %10.2f %10.2f" % (name, seconds, size / 2 ** 20 / seconds, peak / 2 ** 20))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        print()
+        regressed = compare(results, baseline, args.threshold)
+        if regressed:
+            print("regressed: %s" % ", ".join(regressed))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+helpers shared by benchmarks: loading 1D_SVG_Tools.py without blender and generating COIL style base sheets
+"""
+
+import os
+import base64
+import random
+import importlib.util
+
+
+TOOLS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "1D_SVG_Tools.py")
+
+SHEET_HEAD = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<!-- Created with Inkscape (http://www.inkscape.org/) -->
+<svg
+   xmlns:dc="http://purl.org/dc/elements/1.1/"
+   xmlns:cc="http://creativecommons.org/ns#"
+   xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+   xmlns:svg="http://www.w3.org/2000/svg"
+   xmlns="http://www.w3.org/2000/svg"
+   xmlns:xlink="http://www.w3.org/1999/xlink"
+   xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+   xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+   width="%(size)i"
+   height="%(size)i"
+   viewBox="0 0 %(size)i %(size)i"
+   version="1.1"
+   id="svg8">
+  <defs
+     id="defs2">
+    <linearGradient
+       id="linearGradient1">
+      <stop
+         style="stop-color:#1a1a1a;stop-opacity:1"
+         offset="0"
+         id="stop1" />
+    </linearGradient>
+  </defs>
+  <sodipodi:namedview
+     id="base"
+     pagecolor="#ffffff"
+     inkscape:document-units="px">
+    <inkscape:grid
+       type="xygrid"
+       id="grid1" />
+  </sodipodi:namedview>
+  <metadata
+     id="metadata5">
+    <rdf:RDF>
+      <cc:Work
+         rdf:about="">
+        <dc:format>image/svg+xml</dc:format>
+        <dc:title>COIL &amp; benchmark</dc:title>
+      </cc:Work>
+    </rdf:RDF>
+  </metadata>
+  <g
+     inkscape:label="Layer 1"
+     inkscape:groupmode="layer"
+     id="layer1">
+"""
+
+SHEET_TAIL = """  </g>
+</svg>
+"""
+
+
+def load_tools():
+    """import 1D_SVG_Tools.py as module, its name isn't valid identifier"""
+    spec = importlib.util.spec_from_file_location("svg_tools", TOOLS_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate_sheet(file_name, columns=10, rows=10, paths=10, depth=2, size=64, seed=0, transforms=0.0, images=0,
+                   image_size=16384):
+    """write base sheet: icon in even column, label image in next column, as SVGIconSplitter expects.
+    transforms - share of icons with translated innermost group, images - count of image_size bytes rasters
+    embedded as wrapped base64 like Inkscape does, they are put left of the sheet where no icon is"""
+
+    rnd = random.Random(seed)
+    number = 0
+    with open(file_name, "w", encoding="utf-8") as svg_file:
+        svg_file.write(SHEET_HEAD % {"size": size})
+        for row in range(rows):
+            for column in range(columns):
+                x0, y0 = column * 2 * size, row * size
+                offset = " " * 4
+                transform = rnd.random() < transforms
+                for level in range(depth):
+                    if transform and level == depth - 1:
+                        svg_file.write('%s<g\n%s   transform="translate(0.5,0.5)"\n%s   id="g%i_%i">\n'
+                                       % (offset, offset, offset, number, level))
+                    else:
+                        svg_file.write('%s<g\n%s   id="g%i_%i">\n' % (offset, offset, number, level))
+                    offset += "  "
+                for _ in range(paths):
+                    number += 1
+                    x = round(x0 + rnd.uniform(4, size / 2), 3)
+                    y = round(y0 + rnd.uniform(4, size / 2), 3)
+                    kind = number % 4
+                    if kind == 0:
+                        svg_file.write('%s<path\n%s   style="fill:#1a1a1a;stroke:none"\n%s   d="M %s,%s L %s,%s %s,%s Z"'
+                                       '\n%s   id="path%i" />\n' % (offset, offset, offset, x, y, x + 10, y, x + 10,
+                                                                    y + 10, offset, number))
+                    elif kind == 1:
+                        svg_file.write('%s<path\n%s   style="fill:#e6e6e6;stroke:#1a1a1a;stroke-width:2"\n'
+                                       '%s   d="m %s,%s c 1.5,2 3,4 5,6 l 3,0 h 4 v 5 z"\n%s   id="path%i" />\n'
+                                       % (offset, offset, offset, x, y, offset, number))
+                    elif kind == 2:
+                        svg_file.write('%s<rect\n%s   style="fill:#4d4d4d"\n%s   x="%s"\n%s   y="%s"\n%s   width="10"\n'
+                                       '%s   height="5"\n%s   id="rect%i" />\n' % (offset, offset, offset, x, offset,
+                                                                                 y, offset, offset, offset, number))
+                    else:
+                        svg_file.write('%s<circle\n%s   style="fill:#ffffff"\n%s   cx="%s"\n%s   cy="%s"\n%s   r="3"\n'
+                                       '%s   id="circle%i" />\n' % (offset, offset, offset, x, offset, y, offset,
+                                                                   offset, number))
+                for level in range(depth):
+                    offset = offset[:-2]
+                    svg_file.write("%s</g>\n" % offset)
+                svg_file.write('    <image\n       x="%i"\n       y="%i"\n       width="20"\n       height="20"\n'
+                               '       xlink:href="%s/icon_%i_%i.png"\n       id="image%i_%i" />\n'
+                               % (x0 + size + 2, y0 + 2, "actions" if column % 2 else "apps", column, row, column,
+                                  row))
+        for i in range(images):
+            data = base64.encodebytes(rnd.getrandbits(image_size * 8).to_bytes(image_size, "little")).decode("ascii")
+            svg_file.write('    <image\n       x="%i"\n       y="0"\n       width="%i"\n       height="%i"\n'
+                           '       xlink:href="data:image/png;base64,%s"\n       id="embedded%i" />\n'
+                           % (-(i + 1) * 2 * size, size, size, data.rstrip(), i))
+        svg_file.write(SHEET_TAIL)
+    return file_name
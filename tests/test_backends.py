@@ -0,0 +1,104 @@
+"""
+parser backends must give the same tree. python -m unittest discover tests
+"""
+
+import os
+import io
+import tempfile
+import unittest
+import importlib.util
+
+
+TOOLS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "1D_SVG_Tools.py")
+
+SHEET = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<!DOCTYPE svg [
+<!ENTITY style "fill:#1a1a1a">
+<!ENTITY secret SYSTEM "%s">
+]>
+<svg
+   xmlns="http://www.w3.org/2000/svg"
+   xmlns:xlink="http://www.w3.org/1999/xlink"
+   xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+   width="64" height="64">
+  <g inkscape:label="Layer 1" inkscape:groupmode="layer" id="layer1">
+    <text xml:space="preserve" x="1" y="2" style="&style;">COIL &amp; &style; &secret; icons</text>
+    <path d="M 1,2 L 3,4 Z" id="path1" />
+    <image xlink:href="icon.png" x="64" y="0" />
+  </g>
+</svg>
+"""
+
+
+# windows line ends and multibyte text, chunks of few bytes cut characters and line ends
+CRLF_SHEET = ('<?xml version="1.0" encoding="UTF-8"?>\r\n'
+              '<svg xmlns="http://www.w3.org/2000/svg" xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"'
+              ' width="64" height="64">\r\n'
+              '  <g inkscape:label="\u0421\u043b\u043e\u0439 1" id="layer1">\r\n'
+              '    <text xml:space="preserve" style="font-family:\u00c6rial">'
+              '\u041f\u0440\u0438\u0432\u0435\u0442 &amp; \u65e5\u672c\u8a9e &lt;icons&gt;</text>\r\n'
+              '    <path d="M 1,2 L 3,4 Z" id="path1" />\r\n'
+              '    <linearGradient id="linearGradient1"><stop offset="0" id="stop1" /></linearGradient>\r\n'
+              '  </g>\r\n'
+              '</svg>\r\n')
+
+
+def load_tools():
+    spec = importlib.util.spec_from_file_location("svg_tools", TOOLS_PATH)
+    tools = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(tools)
+    return tools
+
+
+tools = load_tools()
+CHUNK_SIZE = tools.StructureBuilder.CHUNK_SIZE
+
+
+class BackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.secret = os.path.join(self.directory.name, "secret.txt")
+        with open(self.secret, "w", encoding="utf-8") as file:
+            file.write("SECRET")
+        self.sheet = os.path.join(self.directory.name, "sheet.svg")
+        with open(self.sheet, "w", encoding="utf-8") as file:
+            file.write(SHEET % self.secret)
+        self.crlf_sheet = os.path.join(self.directory.name, "crlf.svg")
+        with open(self.crlf_sheet, "w", encoding="utf-8", newline="") as file:
+            file.write(CRLF_SHEET)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        tools.StructureBuilder.CHUNK_SIZE = CHUNK_SIZE
+
+    def write(self, backend, sheet=None, chunk_size=None):
+        tools.StructureBuilder.CHUNK_SIZE = chunk_size or CHUNK_SIZE
+        builder = tools.StructureBuilder(sheet or self.sheet, backend)
+        self.assertEqual(builder.backend, backend)
+        output = io.StringIO()
+        builder.root[0].write(output)
+        return output.getvalue()
+
+    @unittest.skipUnless(tools.LxmlBackend.available(), "lxml isn't installed")
+    def test_lxml_equals_expat(self):
+        expat = self.write("expat")
+        lxml = self.write("lxml")
+        self.assertIn('xml:space="preserve"', expat)
+        self.assertEqual(lxml, expat)
+
+    def test_html_equals_expat(self):
+        expat = self.write("expat", self.crlf_sheet)
+        self.assertIn("\u65e5\u672c\u8a9e", expat)
+        for chunk_size in (1, 7, None):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.write("html", self.crlf_sheet, chunk_size), expat)
+                self.assertEqual(self.write("expat", self.crlf_sheet, chunk_size), expat)
+
+    @unittest.skipUnless(tools.LxmlBackend.available(), "lxml isn't installed")
+    def test_lxml_skips_external_entities(self):
+        self.assertNotIn("SECRET", self.write("lxml"))
+
+
+if __name__ == "__main__":
+    unittest.main()